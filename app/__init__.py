@@ -2,7 +2,6 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from werkzeug.middleware.proxy_fix import ProxyFix   
-from flask_migrate import Migrate   
 import os
 
 # ==========================================================
@@ -10,7 +9,6 @@ import os
 # ==========================================================
 db = SQLAlchemy()
 login_manager = LoginManager()
-migrate = Migrate() 
 
 # --- Konfigurasi default Flask‑Login ---
 login_manager.login_view = "auth.login"
@@ -20,15 +18,17 @@ login_manager.login_message_category = "info"
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Dipanggil oleh Flask‑Login untuk memuat user aktif berdasarkan ID."""
-    from app.models import User  # Menghindari circular import
-    return User.query.get(int(user_id))
+    """Dipanggil oleh Flask‑Login untuk memuat user aktif berdasarkan ID (lewat cache identitas)."""
+    from app.identity import load_identity  # Menghindari circular import
+    return load_identity(user_id)
 
 
 # ==========================================================
 # 🏗️  Factory Function : membuat & mengonfigurasi Flask App
 # ==========================================================
 def create_app():
+    from app.startup import StartupTimer, schema_managed_by_cli  # Menghindari circular import
+    timer = StartupTimer()
     app = Flask(__name__)
 
     # ✅ Beri tahu Flask bahwa koneksi lewat HTTPS (via proxy Render)
@@ -37,8 +37,16 @@ def create_app():
     # -------------------- Konfigurasi dasar --------------------
     # Mengambil SECRET_KEY dari environment Render jika ada, fallback ke string biasa
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "kuncirahasia_superaman")
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///hrd_portal.db"
+    # Database dari DATABASE_URL (default SQLite di instance/); PRAGMA SQLite lihat app/database.py
+    from app.database import database_uri, engine_options, init_database
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLITE_JOURNAL_MODE"] = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    app.config["SQLITE_SYNCHRONOUS"] = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+    app.config["SQLITE_CACHE_SIZE_KB"] = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "20000"))
+    app.config["SQLITE_MMAP_SIZE_MB"] = int(os.environ.get("SQLITE_MMAP_SIZE_MB", "128"))
 
     # ==========================================================
     # 🔧 UPDATE PENTING: FIX LOGIN DI HP & RENDER
@@ -58,17 +66,81 @@ def create_app():
     app.config["REMEMBER_COOKIE_SAMESITE"] = "Lax"
     app.config["REMEMBER_COOKIE_SECURE"] = is_production
     app.config["REMEMBER_COOKIE_HTTPONLY"] = True
+
+    # production: worker tidak create_all / seed akun saat start (lihat app/startup.py)
+    app.config["STARTUP_MODE"] = os.environ.get(
+        "STARTUP_MODE", "production" if is_production else "development"
+    ).strip().lower()
     # ==========================================================
 
     # Folder upload + batas ukuran file upload
     app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, "static", "uploads")
     app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024  # Maks 5 MB
+    # Penyajian file upload: masa cache browser & serah-terima ke proxy depan
+    # UPLOAD_ACCEL: "" (dikirim Flask), "x-accel-redirect" (Nginx) atau "x-sendfile" (Apache/Lighttpd)
+    app.config["UPLOAD_CACHE_MAX_AGE"] = int(os.environ.get("UPLOAD_CACHE_MAX_AGE", 365 * 24 * 3600))
+    app.config["UPLOAD_ACCEL"] = os.environ.get("UPLOAD_ACCEL", "").strip().lower()
+    app.config["UPLOAD_ACCEL_PREFIX"] = os.environ.get("UPLOAD_ACCEL_PREFIX", "/_uploads/")
+
+    # File penanda versi data untuk cache respons (lihat app/cache.py)
+    app.config["CACHE_VERSION_DIR"] = os.environ.get(
+        "CACHE_VERSION_DIR", os.path.join(app.instance_path, "cache_versions")
+    )
+
+    # Karantina file upload yatim (flask uploads gc)
+    app.config["UPLOAD_QUARANTINE_DIR"] = os.path.join(app.instance_path, "uploads_quarantine")
+
+    # Ingest gambar upload: batas sisi terpanjang & kualitas JPEG hasil kompres ulang
+    app.config["UPLOAD_IMAGE_MAX_EDGE"] = int(os.environ.get("UPLOAD_IMAGE_MAX_EDGE", "2048"))
+    app.config["UPLOAD_IMAGE_QUALITY"] = int(os.environ.get("UPLOAD_IMAGE_QUALITY", "82"))
+
+    # Format varian gambar upload (avatar/card/full): "webp" atau "jpeg"
+    app.config["IMAGE_VARIANT_FORMAT"] = os.environ.get("IMAGE_VARIANT_FORMAT", "webp").strip().lower()
+
+    # Foto aktivitas diproses di background: ukuran antrean per worker (0 = langsung di request),
+    # jumlah retry, waktu tunggu saat worker berhenti
+    app.config["ACTIVITY_PHOTO_INBOX"] = os.path.join(app.instance_path, "activity_inbox")
+    app.config["ACTIVITY_PHOTO_QUEUE_SIZE"] = int(os.environ.get("ACTIVITY_PHOTO_QUEUE_SIZE", "32"))
+    app.config["ACTIVITY_PHOTO_RETRIES"] = int(os.environ.get("ACTIVITY_PHOTO_RETRIES", "3"))
+    app.config["ACTIVITY_PHOTO_DRAIN_TIMEOUT"] = float(os.environ.get("ACTIVITY_PHOTO_DRAIN_TIMEOUT", "20"))
+    app.config["ACTIVITY_PHOTO_RECOVER_AFTER"] = 120  # detik sebelum log pending dianggap yatim
+
+    # Header X-Query-Count di setiap respons (selalu aktif saat debug/testing)
+    app.config["QUERY_COUNT_HEADER"] = os.environ.get("QUERY_COUNT_HEADER", "").lower() in ("1", "true", "yes")
+
+    # Cache PDF biodata (hasil render) + batas ukuran total
+    app.config["PDF_CACHE_DIR"] = os.environ.get(
+        "PDF_CACHE_DIR", os.path.join(app.instance_path, "pdf_cache")
+    )
+    app.config["PDF_CACHE_MAX_BYTES"] = int(os.environ.get("PDF_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+    # Renderer PDF biodata: "xhtml2pdf" (template HTML) atau "reportlab" (layout langsung, jauh lebih cepat)
+    app.config["PDF_RENDERER"] = os.environ.get("PDF_RENDERER", "xhtml2pdf").strip().lower()
+    if app.config["PDF_RENDERER"] not in ("xhtml2pdf", "reportlab"):
+        app.config["PDF_RENDERER"] = "xhtml2pdf"
+
+    # Cetak massal PDF: jumlah proses render & lokasi file status job
+    app.config["BULK_PDF_WORKERS"] = int(os.environ.get("BULK_PDF_WORKERS", min(2, os.cpu_count() or 1)))
+    app.config["BULK_PDF_MAX_EMPLOYEES"] = int(os.environ.get("BULK_PDF_MAX_EMPLOYEES", "1000"))
+    app.config["BULK_PDF_JOB_DIR"] = os.path.join(app.instance_path, "bulk_pdf_jobs")
+    app.config["BULK_PDF_JOB_TTL_HOURS"] = float(os.environ.get("BULK_PDF_JOB_TTL_HOURS", "24"))
+
+    timer.mark("config")
 
     # Inisialisasi ekstensi
     db.init_app(app)
+    init_database(app, db)
     login_manager.init_app(app)
-    migrate.init_app(app, db)  
+    # Flask-Migrate (alembic, mako, pygments ≈ 150 ms import) hanya untuk CLI & development
+    if app.config["STARTUP_MODE"] != "production" or os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    from app.activity_photos import photo_queue  # Menghindari circular import
+    photo_queue.init_app(app)
+    from app.query_budget import init_query_budget
+    init_query_budget(app)
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    timer.mark("extensions")
 
     # ==========================================================
     # 🔹 REGISTRASI BLUEPRINTS (TIDAK ADA YANG DIUBAH)
@@ -104,6 +176,19 @@ def create_app():
     except ModuleNotFoundError:
         pass
 
+    # ==========================================================
+    # 🔹 HELPER TEMPLATE ({{ upload_url(emp.photo, 'avatar') }})
+    # ==========================================================
+    from app.images import upload_url
+    app.add_template_global(upload_url)
+    timer.mark("blueprints")
+
+    # ==========================================================
+    # 🔹 PERINTAH CLI (flask attendance-stats rebuild, dst.)
+    # ==========================================================
+    from app.cli import register_commands
+    register_commands(app)
+
     # ==========================================================
     # 🔹 ERROR HANDLER UMUM
     # ==========================================================
@@ -135,14 +220,24 @@ def create_app():
     # 🔹 INISIALISASI DB & AKUN DEFAULT
     # ==========================================================
     with app.app_context():
-        # ✅ UPDATE: Pastikan tabel dibuat ulang jika database ter-reset di Render
-        db.create_all() 
-        
-        try:
-            init_default_accounts()
-        except Exception as e:
-            print(f"ℹ️  Tidak dapat membuat akun default: {e}")
+        if app.config["STARTUP_MODE"] == "production":
+            # Cukup satu query revisi; skema & akun lewat `flask init-db` / `flask seed-accounts`
+            from app.startup import check_schema
+            check_schema(app)
+        elif not schema_managed_by_cli():
+            # Database kosong → create_all + stamp; database lama → upgrade ke head.
+            # Perintah CLI (flask init-db, flask db upgrade) menyiapkan skema sendiri.
+            from app.startup import init_schema
+            init_schema(app)
+
+            try:
+                init_default_accounts()
+            except Exception as e:
+                print(f"ℹ️  Tidak dapat membuat akun default: {e}")
+    timer.mark("schema")
 
+    app.extensions["startup_timings"] = timer.phases
+    print(f"⏱️  Startup ({app.config['STARTUP_MODE']}): {timer.summary()}")
     return app
 
 
@@ -151,30 +246,13 @@ def create_app():
 # ==========================================================
 def init_default_accounts():
     """Membuat akun default admin, employee, dan client secara otomatis."""
-    from app.models import User
+    from app.startup import seed_default_accounts
     from sqlalchemy.exc import OperationalError
 
     try:
-        admin = User.query.filter_by(username="admin").first()
-        if not admin:
-            admin = User(username="admin", role="admin", active=True)
-            admin.set_password("admin123")
-            db.session.add(admin)
-
-        employee = User.query.filter_by(username="employee").first()
-        if not employee:
-            employee = User(username="employee", role="employee", active=True)
-            employee.set_password("employee123")
-            db.session.add(employee)
-
-        client_user = User.query.filter_by(username="client").first()
-        if not client_user:
-            client_user = User(username="client", role="client", active=True)
-            client_user.set_password("client123")
-            db.session.add(client_user)
-
-        db.session.commit()
+        seed_default_accounts()
         print("✅ Default users initialized (admin / employee / client).")
 
     except OperationalError:
-        print("ℹ️  Database belum siap, akun default dilewati sementara.")
\ No newline at end of file
+        db.session.rollback()
+        print("ℹ️  Database belum siap, akun default dilewati sementara.")
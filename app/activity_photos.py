@@ -0,0 +1,290 @@
+# ==============================================================
+#  app/activity_photos.py – Proses foto aktivitas di background
+# ==============================================================
+#  Upload foto dari HP bisa lambat; request upload_activity cukup
+#  menyimpan byte mentah ke inbox (instance/activity_inbox) dan
+#  langsung redirect. Antrean terbatas per worker lalu:
+#    baca GPS → ingest (EXIF orientation, downscale, buang
+#    metadata) → simpan sebagai blob → buat varian → isi
+#    ActivityLog.image (+ GPS jika koordinat form kosong).
+#
+#  Status di ActivityLog.image_status: pending → ready / failed.
+#  Di thread background, gagal dicoba ulang beberapa kali (backoff).
+#  Jika antrean penuh / nonaktif, foto diproses di request hanya
+#  SEKALI tanpa jeda; gagal → tetap pending.
+#
+#  Thread dimulai pada request pertama setiap worker (aman setelah
+#  fork gunicorn) dan setiap ACTIVITY_PHOTO_RECOVER_AFTER detik
+#  menganggur mengambil log pending yang tertinggal (worker mati,
+#  gagal di request). Saat worker berhenti, antrean dikosongkan dulu
+#  (atexit). Dengan ACTIVITY_PHOTO_QUEUE_SIZE=0 tidak ada thread:
+#  jadwalkan `flask activity-photos process` (cron) untuk sisa pending.
+# ==============================================================
+
+import atexit
+import contextlib
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.images import generate_variants
+from app.models import ActivityLog
+from app.storage import OWNER_ACTIVITY_IMAGE, CHUNK_SIZE, file_extension, link_upload, store_stream
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+# Tag EXIF GPS (IFD 0x8825)
+_GPS_IFD = 0x8825
+_GPS_LATITUDE_REF, _GPS_LATITUDE = 1, 2
+_GPS_LONGITUDE_REF, _GPS_LONGITUDE = 3, 4
+
+
+# ------------------------------------------------------------
+# 📥 Inbox file mentah
+# ------------------------------------------------------------
+def inbox_path(raw_name):
+    return os.path.join(current_app.config["ACTIVITY_PHOTO_INBOX"], raw_name)
+
+
+def save_raw_photo(file):
+    """Tulis FileStorage apa adanya ke inbox. Mengembalikan nama file mentah."""
+    folder = current_app.config["ACTIVITY_PHOTO_INBOX"]
+    os.makedirs(folder, exist_ok=True)
+    raw_name = f"{uuid.uuid4().hex}.{file_extension(file.filename)}"
+    with open(os.path.join(folder, raw_name), "wb") as out:
+        for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b""):
+            out.write(chunk)
+    return raw_name
+
+
+# ------------------------------------------------------------
+# 🖼️ Pemrosesan satu foto
+# ------------------------------------------------------------
+def _degrees(dms, ref):
+    degrees, minutes, seconds = (float(v) for v in dms)
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if ref in ("S", "W") else value
+
+
+def gps_coordinates(exif):
+    """(lat, lon) dari EXIF GPS, atau None jika tidak ada / rusak."""
+    try:
+        gps = exif.get_ifd(_GPS_IFD)
+        if _GPS_LATITUDE not in gps or _GPS_LONGITUDE not in gps:
+            return None
+        return (
+            _degrees(gps[_GPS_LATITUDE], gps.get(_GPS_LATITUDE_REF)),
+            _degrees(gps[_GPS_LONGITUDE], gps.get(_GPS_LONGITUDE_REF)),
+        )
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def read_gps(path):
+    """Koordinat GPS dari EXIF file mentah (hanya header, tanpa decode piksel)."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return gps_coordinates(img.getexif())
+    except OSError:  # termasuk UnidentifiedImageError
+        return None
+
+
+def process_activity_photo(log_id):
+    """
+    Proses foto satu ActivityLog berstatus pending lalu commit.
+    Aman dipanggil ulang: log yang sudah selesai dilewati.
+    """
+    log = db.session.get(ActivityLog, log_id)
+    if log is None or log.image_status != STATUS_PENDING or not log.image_raw:
+        return
+
+    raw_path = inbox_path(log.image_raw)
+    coords = read_gps(raw_path)  # dibaca sebelum ingest membuang metadata
+    with open(raw_path, "rb") as raw:
+        stored = store_stream(raw, file_extension(log.image_raw), require_image=True)
+    generate_variants(stored.name)
+
+    log.image = stored.name
+    log.image_status = STATUS_READY
+    log.image_raw = None
+    if coords and log.latitude is None and log.longitude is None:
+        log.latitude, log.longitude = coords
+    link_upload(stored, OWNER_ACTIVITY_IMAGE, log.id)
+    db.session.commit()
+
+    # Worker lain (recovery) mungkin sudah menghapusnya lebih dulu
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(raw_path)
+
+
+def pending_log_ids(before=None, limit=None, include_failed=False):
+    """ID log yang fotonya belum selesai diproses (urut terlama)."""
+    statuses = [STATUS_PENDING, STATUS_FAILED] if include_failed else [STATUS_PENDING]
+    query = db.session.query(ActivityLog.id).filter(ActivityLog.image_status.in_(statuses))
+    if before is not None:
+        query = query.filter(ActivityLog.created_at < before)
+    return [row.id for row in query.order_by(ActivityLog.id).limit(limit)]
+
+
+def mark_failed(log_id):
+    """Tandai gagal (file mentah tetap di inbox agar bisa diproses ulang)."""
+    db.session.query(ActivityLog).filter(
+        ActivityLog.id == log_id, ActivityLog.image_status == STATUS_PENDING
+    ).update({ActivityLog.image_status: STATUS_FAILED}, synchronize_session=False)
+    db.session.commit()
+
+
+# ==============================================================
+# 🧵 ANTREAN PER WORKER
+# ==============================================================
+class ActivityPhotoQueue:
+    """
+    Satu thread pemroses per proses web dengan antrean berbatas.
+    Antrean penuh → foto dicoba sekali langsung di request (backpressure);
+    jika gagal tetap pending, sehingga tidak ada pekerjaan yang hilang.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["activity_photos"] = self
+        atexit.register(self.shutdown)
+
+        @app.before_request
+        def _start_activity_photo_worker():
+            # Dimulai di proses worker (bukan master sebelum fork) → recovery langsung jalan
+            if self._pid != os.getpid() and app.config["ACTIVITY_PHOTO_QUEUE_SIZE"] > 0:
+                self._ensure_worker()
+
+    # -- sisi request ------------------------------------------
+    def submit(self, log_id):
+        """Masukkan log ke antrean; False jika diproses langsung (sinkron)."""
+        if self.app.config["ACTIVITY_PHOTO_QUEUE_SIZE"] <= 0 or not self._ensure_worker():
+            self.process(log_id, inline=True)
+            return False
+        try:
+            self._queue.put_nowait(log_id)
+            return True
+        except queue.Full:
+            logger.warning(f"⚠️ Antrean foto aktivitas penuh, log {log_id} diproses langsung.")
+            self.process(log_id, inline=True)
+            return False
+
+    def _ensure_worker(self):
+        with self._lock:
+            # Setelah fork (gunicorn --preload) thread lama tidak ikut → buat baru
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return True
+            if self._pid == os.getpid() and self._queue is None:
+                return False  # sudah shutdown
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.app.config["ACTIVITY_PHOTO_QUEUE_SIZE"])
+            self._thread = threading.Thread(
+                target=self._work, args=(self._queue,), name="activity-photos", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    # -- sisi thread -------------------------------------------
+    def _work(self, q):
+        self._recover()
+        while True:
+            try:
+                log_id = q.get(timeout=self.app.config["ACTIVITY_PHOTO_RECOVER_AFTER"])
+            except queue.Empty:
+                self._recover()  # menganggur → ambil log pending yang tertinggal
+                continue
+            try:
+                if log_id is None:
+                    return
+                self.process(log_id)
+            finally:
+                q.task_done()
+
+    def _recover(self):
+        """Ambil log pending milik worker sebelumnya yang berhenti di tengah jalan."""
+        cutoff = datetime.now() - timedelta(seconds=self.app.config["ACTIVITY_PHOTO_RECOVER_AFTER"])
+        with self.app.app_context():
+            try:
+                ids = pending_log_ids(before=cutoff, limit=self.app.config["ACTIVITY_PHOTO_QUEUE_SIZE"])
+            except Exception as e:
+                logger.warning(f"⚠️ Gagal membaca foto aktivitas yang tertunda: {e}")
+                ids = []
+        for log_id in ids:
+            self.process(log_id)
+
+    def process(self, log_id, inline=False):
+        """
+        Proses satu log dengan retry + backoff; habis percobaan → failed.
+        inline=True (di dalam request): sekali coba tanpa jeda; gagal →
+        tetap pending untuk recovery thread / `flask activity-photos process`.
+        """
+        from PIL import UnidentifiedImageError
+
+        retries = 0 if inline else self.app.config["ACTIVITY_PHOTO_RETRIES"]
+        for attempt in range(retries + 1):
+            with self.app.app_context():
+                try:
+                    process_activity_photo(log_id)
+                    return True
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(
+                        f"⚠️ Gagal memproses foto aktivitas {log_id} "
+                        f"(percobaan {attempt + 1}/{retries + 1}): {e}"
+                    )
+                    # File bukan gambar tidak akan berhasil walau dicoba ulang
+                    permanent = isinstance(e, UnidentifiedImageError)
+                    if attempt == retries or permanent:
+                        if permanent or not inline:
+                            try:
+                                mark_failed(log_id)
+                            except Exception:
+                                db.session.rollback()
+                        return False
+            time.sleep(0.5 * 2 ** attempt)
+
+    # -- shutdown ----------------------------------------------
+    def shutdown(self, timeout=None):
+        """Selesaikan antrean yang tersisa lalu hentikan thread (dipanggil atexit)."""
+        with self._lock:
+            thread, q = self._thread, self._queue
+            if thread is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._queue = None
+        if timeout is None:
+            timeout = self.app.config["ACTIVITY_PHOTO_DRAIN_TIMEOUT"]
+        try:
+            q.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(
+                f"⚠️ Antrean foto aktivitas belum habis ({q.qsize()} tersisa), "
+                "dilanjutkan oleh worker berikutnya."
+            )
+
+
+photo_queue = ActivityPhotoQueue()
@@ -0,0 +1,133 @@
+# ==============================================================
+#  app/cache.py – Cache respons berumur pendek (per worker)
+# ==============================================================
+#  TTLCache menyimpan hasil query yang sering diminta (mis. modal
+#  chart dashboard) di memori worker selama beberapa detik.
+#
+#  Agar data tidak basi setelah ada perubahan, setiap kelompok data
+#  punya "versi" berupa file penanda di instance/cache_versions/.
+#  Commit yang mengubah model yang diawasi (watch_models), termasuk
+#  UPDATE/DELETE massal lewat session, menyentuh file tersebut; versi (mtime) ikut menjadi bagian kunci cache,
+#  sehingga semua worker gunicorn langsung memakai kunci baru.
+# ==============================================================
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# nama versi → tuple kelas model yang diawasi
+_watched = {}
+
+
+class TTLCache:
+    """Cache LRU thread-safe; entri kedaluwarsa setelah `ttl` detik."""
+
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ------------------------------------------------------------
+# 🔖 Versi data (dibagi antar worker lewat file penanda)
+# ------------------------------------------------------------
+def _version_path(name):
+    return os.path.join(current_app.config["CACHE_VERSION_DIR"], name)
+
+
+def data_version(name):
+    """Versi kelompok data `name` (berubah setiap ada commit yang relevan)."""
+    try:
+        return os.stat(_version_path(name)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_data_version(name):
+    path = _version_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Isi file = waktu ns agar mtime pasti berubah walau resolusi jam kasar
+    with open(path, "w") as fh:
+        fh.write(str(time.time_ns()))
+
+
+def watch_models(name, *models):
+    """Naikkan versi `name` setiap commit yang menambah/mengubah/menghapus `models`."""
+    _watched[name] = models
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if not _watched:
+        return
+    changed = session.info.setdefault("changed_data_versions", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for name, models in _watched.items():
+            if isinstance(obj, models):
+                changed.add(name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    # query(...).update() / delete() & session.execute(update(...)) tidak lewat flush
+    if not _watched or not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table_name = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    if table_name is None:
+        return
+    changed = orm_execute_state.session.info.setdefault("changed_data_versions", set())
+    for name, models in _watched.items():
+        if any(model.__tablename__ == table_name for model in models):
+            changed.add(name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    for name in session.info.pop("changed_data_versions", ()):
+        try:
+            bump_data_version(name)
+        except (OSError, RuntimeError) as e:  # RuntimeError: di luar app context
+            logger.warning(f"⚠️ Gagal memperbarui versi cache {name}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_versions(session):
+    session.info.pop("changed_data_versions", None)
@@ -0,0 +1,525 @@
+# ==============================================================
+#  app/cli.py – Perintah CLI tambahan (flask <perintah>)
+# ==============================================================
+
+import os
+import time
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+
+# 🔹 Grup perintah ringkasan absensi
+attendance_stats_cli = AppGroup('attendance-stats', help='Kelola tabel attendance_daily_stats.')
+
+
+@attendance_stats_cli.command('rebuild')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Tanggal awal (YYYY-MM-DD). Kosong = seluruh riwayat.')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Tanggal akhir (YYYY-MM-DD).')
+def rebuild_attendance_stats(start, end):
+    """Hitung ulang ringkasan absensi harian dari tabel attendance."""
+    from app.stats import rebuild_daily_stats
+
+    rows = rebuild_daily_stats(
+        start.date() if start else None,
+        end.date() if end else None,
+    )
+    click.echo(f"✅ attendance_daily_stats dibangun ulang ({rows} baris ringkasan).")
+
+
+# 🔹 Grup perintah PDF biodata
+pdf_cli = AppGroup('pdf', help='Utilitas PDF biodata karyawan.')
+
+
+def _sample_employee():
+    """Karyawan contoh (tidak disimpan) untuk benchmark di database kosong."""
+    from app.models import Employee, EmployeePersonalDetail
+
+    employee = Employee(id=0, name="Budi Santoso", position="Staff Administrasi", status="aktif")
+    employee.personal_detail = EmployeePersonalDetail(
+        nik="3174012345678901", birth_place="Jakarta", birth_date=date(1990, 5, 17),
+        gender="Laki-laki", marital_status="Menikah",
+        address_ktp="Jl. Melati No. 12, RT 003/RW 005, Kel. Kebayoran Lama, Jakarta Selatan",
+        address_current="Jl. Kenanga No. 8, Tangerang Selatan", phone="081234567890",
+        email="budi@example.com", education="S1", bpjs_ketenagakerjaan="12345678901",
+        bpjs_kesehatan="0001234567890", emergency_contact_name="Siti Aminah",
+        emergency_relation="Istri", emergency_phone="081298765432",
+    )
+    return employee
+
+
+@pdf_cli.command('benchmark')
+@click.option('--employee-id', type=int, default=None,
+              help='ID karyawan yang dirender. Kosong = karyawan pertama / data contoh.')
+@click.option('--runs', type=click.IntRange(1), default=20, show_default=True,
+              help='Jumlah render per renderer.')
+@click.option('--renderer', 'renderers', type=click.Choice(['xhtml2pdf', 'reportlab']),
+              multiple=True, help='Renderer yang diukur (boleh diulang). Kosong = keduanya.')
+def benchmark_pdf(employee_id, runs, renderers):
+    """Bandingkan waktu render & memori PDF biodata antar renderer."""
+    import statistics
+    import tracemalloc
+
+    from app.hr.pdf_bulk import biodata_photo_path, biodata_render_task
+    from app.hr.routes import PDF_TEMPLATE
+    from app.models import Employee
+
+    if employee_id is not None:
+        employee = Employee.query.get(employee_id)
+        if employee is None:
+            raise click.ClickException(f"Karyawan dengan ID {employee_id} tidak ditemukan.")
+    else:
+        employee = Employee.query.order_by(Employee.id).first() or _sample_employee()
+
+    photo_path = biodata_photo_path(employee)
+    now = datetime.now()
+    click.echo(f"📄 Karyawan: {employee.name} (foto: {'ya' if photo_path else 'tidak'}), {runs}x per renderer")
+
+    results = {}
+    for renderer in renderers or ('xhtml2pdf', 'reportlab'):
+        def render_once():
+            # Waktu termasuk persiapan input (render HTML / ambil isian)
+            render, args = biodata_render_task(employee, photo_path, now, PDF_TEMPLATE, renderer)
+            return render(*args)
+
+        data = render_once()  # pemanasan (import, cache font & template)
+        if not data:
+            click.echo(f"  {renderer:<10} ❌ gagal render")
+            continue
+
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            render_once()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Memori diukur terpisah: tracemalloc memperlambat render
+        tracemalloc.start()
+        render_once()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[renderer] = (statistics.median(timings), peak)
+        click.echo(
+            f"  {renderer:<10} median {statistics.median(timings):8.1f} ms | "
+            f"rata-rata {statistics.mean(timings):8.1f} ms | "
+            f"maks {max(timings):8.1f} ms | "
+            f"puncak memori {peak / 1024:9.0f} KiB | ukuran {len(data) / 1024:6.1f} KiB"
+        )
+
+    if len(results) == 2:
+        (base_ms, base_mem), (rl_ms, rl_mem) = results['xhtml2pdf'], results['reportlab']
+        click.echo(f"⚡ reportlab {base_ms / rl_ms:.1f}x lebih cepat, memori {base_mem / max(rl_mem, 1):.1f}x lebih kecil")
+
+
+# 🔹 Grup perintah gambar upload
+images_cli = AppGroup('images', help='Kelola varian gambar upload (avatar/card/full).')
+
+
+@images_cli.command('backfill')
+@click.option('--force', is_flag=True, help='Buat ulang varian walaupun sudah ada.')
+def backfill_image_variants(force):
+    """Buat varian untuk seluruh gambar yang sudah ada di UPLOAD_FOLDER."""
+    from app.images import generate_variants, iter_upload_images
+
+    files = written = 0
+    for name in iter_upload_images():
+        files += 1
+        written += generate_variants(name, force=force)
+    click.echo(f"✅ {files} gambar diperiksa, {written} varian ditulis.")
+
+
+# 🔹 Grup perintah penyimpanan upload (blob berbasis SHA-256)
+uploads_cli = AppGroup('uploads', help='Kelola penyimpanan file upload.')
+
+
+@uploads_cli.command('index')
+@click.option('--dedupe', is_flag=True,
+              help='Arahkan kolom yang isinya duplikat ke satu file yang sama.')
+def index_uploads(dedupe):
+    """Catat file upload lama ke upload_blobs & upload_references."""
+    from app import db
+    from app.images import DEFAULT_PHOTO, upload_name, upload_path
+    from app.models import UploadBlob
+    from app.storage import UPLOAD_COLUMNS, StoredFile, hash_file, link_upload, get_or_create_blob
+
+    indexed = missing = deduped = 0
+    blobs = {}  # sha256 → UploadBlob (hindari query berulang)
+    hashes = {}  # nama file → sha256 (file dipakai banyak baris cukup di-hash sekali)
+    for owner_type, model, column in UPLOAD_COLUMNS:
+        rows = db.session.query(model.id, column).filter(column.isnot(None), column != '').all()
+        for owner_id, value in rows:
+            name = upload_name(value)
+            if name == DEFAULT_PHOTO:
+                continue
+            path = upload_path(name)
+            if not os.path.isfile(path):
+                missing += 1
+                continue
+
+            if name not in hashes:
+                hashes[name] = hash_file(path)
+            sha256, size = hashes[name]
+            blob = blobs.get(sha256) or UploadBlob.query.filter_by(sha256=sha256).first()
+            if blob is None:
+                blob = get_or_create_blob(sha256, name, size)
+            blobs[sha256] = blob
+
+            if dedupe and value != blob.name:
+                # Salinan dengan isi sama → pakai file blob; file lama dibersihkan oleh GC
+                db.session.query(model).filter(model.id == owner_id).update(
+                    {column: blob.name}, synchronize_session=False
+                )
+                deduped += blob.name != name
+            link_upload(StoredFile(blob.name, blob, False), owner_type, owner_id)
+            indexed += 1
+
+    db.session.commit()
+    click.echo(
+        f"✅ {indexed} referensi dicatat ({len(blobs)} blob unik), "
+        f"{missing} file tidak ditemukan, {deduped} kolom diarahkan ke blob yang sama."
+    )
+
+
+@uploads_cli.command('gc')
+@click.option('--grace-hours', type=click.FloatRange(0), default=24, show_default=True,
+              help='File yang lebih baru dari ini tidak disentuh.')
+@click.option('--dry-run', is_flag=True, help='Hanya tampilkan laporan, tidak ada file yang diubah.')
+@click.option('--delete', is_flag=True, help='Hapus permanen (default: pindah ke karantina).')
+@click.option('--verbose', '-v', is_flag=True, help='Tampilkan setiap file.')
+def gc_uploads(grace_hours, dry_run, delete, verbose):
+    """Bersihkan file upload yang tidak lagi dirujuk database."""
+    from flask import current_app
+
+    from app import db
+    from app.storage import find_orphan_uploads, prune_upload_index, remove_orphan
+
+    quarantine_dir = None
+    if not (dry_run or delete):
+        quarantine_dir = os.path.join(
+            current_app.config["UPLOAD_QUARANTINE_DIR"], datetime.now().strftime('%Y%m%d-%H%M%S')
+        )
+
+    count = total = failed = 0
+    removed = []
+    for orphan in find_orphan_uploads(grace_hours * 3600):
+        if verbose or dry_run:
+            click.echo(f"  {orphan.name} ({orphan.size / 1024:.0f} KB)")
+        if not dry_run:
+            try:
+                remove_orphan(orphan, quarantine_dir)
+            except OSError as e:
+                click.echo(f"⚠️ Gagal membersihkan {orphan.name}: {e}")
+                failed += 1
+                continue
+            if orphan.root == current_app.config["UPLOAD_FOLDER"]:
+                removed.append(orphan.name)
+        count += 1
+        total += orphan.size
+
+    summary = f"{count} file yatim ({total / (1024 * 1024):.1f} MB)"
+    if dry_run:
+        click.echo(f"🔎 Dry run: {summary} akan dibersihkan.")
+        return
+
+    refs, blobs = prune_upload_index(removed)
+    db.session.commit()
+    action = "dihapus" if delete else f"dipindah ke {quarantine_dir}"
+    click.echo(
+        f"✅ {summary} {action}; {refs} referensi & {blobs} blob dibersihkan dari indeks"
+        + (f", {failed} gagal." if failed else ".")
+    )
+
+
+@uploads_cli.command('stats')
+def upload_stats():
+    """Ringkasan ukuran upload: byte asli vs tersimpan setelah ingest."""
+    from sqlalchemy import func
+
+    from app import db
+    from app.models import UploadBlob
+
+    total_files, total_size = db.session.query(
+        func.count(UploadBlob.id), func.coalesce(func.sum(UploadBlob.size), 0)
+    ).one()
+    ingested, original, stored = db.session.query(
+        func.count(UploadBlob.id),
+        func.coalesce(func.sum(UploadBlob.original_size), 0),
+        func.coalesce(func.sum(UploadBlob.size), 0),
+    ).filter(UploadBlob.original_size.isnot(None)).one()
+
+    mb = 1024 * 1024
+    click.echo(f"📦 {total_files} blob, {total_size / mb:.1f} MB tersimpan.")
+    if original:
+        saved = original - stored
+        click.echo(
+            f"📥 {ingested} upload lewat ingest: {original / mb:.1f} MB asli → "
+            f"{stored / mb:.1f} MB ({saved / mb:.1f} MB / {saved * 100 / original:.0f}% hemat)."
+        )
+
+
+# 🔹 Grup perintah foto aktivitas (antrean background)
+activity_photos_cli = AppGroup('activity-photos', help='Kelola pemrosesan foto aktivitas.')
+
+
+@activity_photos_cli.command('process')
+@click.option('--failed', is_flag=True, help='Ikut proses ulang foto yang berstatus failed.')
+def process_activity_photos(failed):
+    """Proses langsung foto aktivitas yang masih pending (tanpa antrean)."""
+    from app import db
+    from app.activity_photos import STATUS_PENDING, pending_log_ids, photo_queue
+    from app.models import ActivityLog
+
+    ids = pending_log_ids(include_failed=failed)
+    if failed and ids:
+        db.session.query(ActivityLog).filter(ActivityLog.id.in_(ids)).update(
+            {ActivityLog.image_status: STATUS_PENDING}, synchronize_session=False
+        )
+        db.session.commit()
+
+    ok = sum(1 for log_id in ids if photo_queue.process(log_id))
+    click.echo(f"✅ {ok} foto diproses, {len(ids) - ok} gagal.")
+
+
+# 🔹 Persiapan database (dipakai STARTUP_MODE=production, lihat app/startup.py)
+@click.command('init-db')
+def init_db():
+    """Buat skema (database kosong) atau upgrade ke revisi migrasi terbaru."""
+    from flask import current_app
+    from app.startup import init_schema
+
+    revision = init_schema(current_app)
+    click.echo(f"✅ Skema database pada revisi {revision}.")
+
+
+@click.command('seed-accounts')
+def seed_accounts():
+    """Buat akun default (admin / employee / client) yang belum ada."""
+    from app.startup import seed_default_accounts
+
+    created = seed_default_accounts()
+    if created:
+        click.echo(f"✅ Akun default dibuat: {', '.join(created)}.")
+    else:
+        click.echo("ℹ️  Semua akun default sudah ada.")
+
+
+@click.command('startup-report')
+def startup_report():
+    """Tampilkan durasi tiap fase create_app pada proses ini."""
+    from flask import current_app
+
+    for phase, seconds in current_app.extensions["startup_timings"].items():
+        click.echo(f"{phase:<12} {seconds * 1000:8.1f} ms")
+    click.echo(f"{'total':<12} {sum(current_app.extensions['startup_timings'].values()) * 1000:8.1f} ms")
+
+
+# Modul berat yang tidak boleh ikut ter-import saat worker start
+HEAVY_IMPORTS = ('PIL', 'reportlab', 'xhtml2pdf', 'html5lib', 'lxml', 'pypdf', 'pyhanko', 'alembic')
+
+
+@click.command('import-report')
+@click.option('--top', type=click.IntRange(1), default=20, show_default=True,
+              help='Jumlah paket termahal yang ditampilkan.')
+@click.option('--mode', type=click.Choice(['production', 'development']), default='production',
+              show_default=True, help='STARTUP_MODE yang diukur.')
+@click.option('--fail-over-ms', type=float, default=None,
+              help='Keluar dengan status 1 jika total import melebihi batas ini (untuk CI).')
+@click.option('--forbid', is_flag=True,
+              help='Keluar dengan status 1 jika modul berat (PIL, reportlab, ...) ikut ter-import.')
+def import_report(top, mode, fail_over_ms, forbid):
+    """Ukur biaya import saat worker start (python -X importtime) per paket."""
+    import re
+    import subprocess
+    import sys
+    from collections import Counter
+    from flask import current_app
+
+    env = dict(os.environ, STARTUP_MODE=mode)
+    env.pop('FLASK_RUN_FROM_CLI', None)  # ukur seperti worker gunicorn, bukan CLI
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+        cwd=os.path.dirname(current_app.root_path), env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise click.ClickException(f"create_app gagal:\n{proc.stderr[-2000:]}")
+
+    per_package = Counter()
+    for line in proc.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)', line)
+        if match:
+            per_package[match.group(2).split('.')[0]] += int(match.group(1))
+    total_ms = sum(per_package.values()) / 1000
+
+    for package, micros in per_package.most_common(top):
+        click.echo(f"{package:<28} {micros / 1000:8.1f} ms")
+    click.echo(f"{'total':<28} {total_ms:8.1f} ms ({len(per_package)} paket)")
+
+    failed = False
+    heavy = sorted(p for p in per_package if p in HEAVY_IMPORTS)
+    if heavy:
+        click.echo(f"⚠️  Modul berat ter-import saat start: {', '.join(heavy)}")
+        failed = forbid
+    if fail_over_ms is not None and total_ms > fail_over_ms:
+        click.echo(f"❌ Total import {total_ms:.0f} ms melebihi batas {fail_over_ms:.0f} ms.")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+# 🔹 Grup perintah database (PRAGMA SQLite & uji konkurensi, lihat app/database.py)
+database_cli = AppGroup('database', help='Info & uji engine database.')
+
+
+@database_cli.command('info')
+def database_info():
+    """Tampilkan URI (tanpa password), pool dan PRAGMA SQLite yang aktif."""
+    from flask import current_app
+    from app import db
+
+    click.echo(f"URI   : {db.engine.url.render_as_string(hide_password=True)}")
+    click.echo(f"Pool  : {db.engine.pool.status()}")
+    if db.engine.dialect.name == 'sqlite':
+        from app.database import sqlite_pragmas
+        for name in sqlite_pragmas(current_app):
+            value = db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+            click.echo(f"PRAGMA {name:<13} = {value}")
+
+
+def _clock_in_worker(uri, cache_dir, jobs, barrier, results):
+    """Satu proses 'worker gunicorn': app sendiri, absen masuk untuk setiap job."""
+    import contextlib
+    import io
+    from collections import Counter
+
+    # Database & file versi cache di folder kerja uji, bukan instance/ repo
+    os.environ['DATABASE_URL'] = uri
+    os.environ['CACHE_VERSION_DIR'] = cache_dir
+    os.environ['STARTUP_MODE'] = 'production'
+    os.environ.pop('FLASK_RUN_FROM_CLI', None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app
+        app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    clients = []
+    for session_id in jobs:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = session_id
+            session['_fresh'] = True
+        clients.append(client)
+
+    statuses = Counter()
+    barrier.wait()
+    for client in clients:
+        statuses[client.post('/employee/do_attendance', data={'action': 'clock_in'}).status_code] += 1
+    results.put(dict(statuses))
+
+
+@database_cli.command('stress')
+@click.option('--workers', type=click.IntRange(1), default=8, show_default=True,
+              help='Jumlah proses paralel (seperti worker gunicorn).')
+@click.option('--employees', type=click.IntRange(1), default=100, show_default=True,
+              help='Jumlah karyawan yang absen masuk bersamaan.')
+@click.option('--taps', type=click.IntRange(1), default=2, show_default=True,
+              help='Berapa kali tiap karyawan menekan absen (dari worker berbeda).')
+@click.option('--workdir', type=click.Path(file_okay=False), default=None,
+              help='Folder untuk database & versi cache uji (default: folder sementara, dihapus setelahnya).')
+def stress_database(workers, employees, taps, workdir):
+    """
+    Uji konkurensi: banyak absen masuk paralel di database SQLite sementara.
+    Gagal (status 1) jika ada respons 500 / "database is locked" atau
+    jumlah absensi & ringkasan harian tidak cocok.
+    """
+    import multiprocessing
+    import shutil
+    import sys
+    import tempfile
+    from collections import Counter
+
+    from flask import current_app
+    from sqlalchemy import create_engine, func
+    from sqlalchemy.orm import Session
+
+    from app import db
+    from app.models import Attendance, AttendanceDailyStat, Employee, User, credentials_version
+    from app.startup import schema_head
+
+    cleanup = workdir is None
+    if cleanup:
+        workdir = tempfile.mkdtemp(prefix='hrd-stress-')
+    else:
+        os.makedirs(workdir, exist_ok=True)
+    uri = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+    cache_dir = os.path.join(workdir, 'cache_versions')
+    try:
+        engine = create_engine(uri)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.execute(db.text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            session.execute(db.text("INSERT INTO alembic_version VALUES (:v)"), {'v': schema_head(current_app)})
+            users = [User(username=f'stress{i}', role='employee', active=True, password_hash='!')
+                     for i in range(employees)]
+            session.add_all(users)
+            session.flush()
+            session.add_all(Employee(name=f'Stress {u.id}', job_type='security', user_id=u.id) for u in users)
+            session.flush()
+            # Database uji terpisah → versi cache aplikasi ini tidak perlu naik
+            session.info.pop('changed_data_versions', None)
+            session.commit()
+            session_ids = [f"{u.id}:{credentials_version(u.password_hash)}" for u in users]
+
+        # Setiap karyawan ditekan `taps` kali dari worker yang berbeda (double tap)
+        jobs = [[] for _ in range(workers)]
+        for tap in range(taps):
+            for i, session_id in enumerate(session_ids):
+                jobs[(i + tap) % workers].append(session_id)
+
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(workers + 1)
+        results = ctx.Queue()
+        processes = [ctx.Process(target=_clock_in_worker, args=(uri, cache_dir, job, barrier, results)) for job in jobs]
+        for process in processes:
+            process.start()
+        barrier.wait(timeout=120)
+        started = time.perf_counter()
+        statuses = Counter()
+        for _ in processes:
+            statuses.update(results.get(timeout=300))
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+        with Session(engine) as session:
+            rows = session.query(func.count(Attendance.id)).filter(Attendance.check_in.isnot(None)).scalar()
+            hadir = session.query(func.coalesce(func.sum(AttendanceDailyStat.hadir), 0)).scalar()
+        engine.dispose()
+
+        total = employees * taps
+        click.echo(f"{total} request dari {workers} proses dalam {elapsed:.2f} s "
+                   f"({total / elapsed:.0f} req/s). Status: {dict(statuses)}")
+        click.echo(f"Absensi tercatat: {rows}/{employees}, ringkasan hadir: {hadir}/{employees}")
+        ok = statuses.get(302, 0) == total and rows == employees and hadir == employees
+        click.echo("✅ Lolos." if ok else "❌ Gagal.")
+        if not ok:
+            sys.exit(1)
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def register_commands(app):
+    """Daftarkan seluruh perintah CLI ke aplikasi Flask."""
+    app.cli.add_command(attendance_stats_cli)
+    app.cli.add_command(pdf_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(uploads_cli)
+    app.cli.add_command(activity_photos_cli)
+    app.cli.add_command(init_db)
+    app.cli.add_command(seed_accounts)
+    app.cli.add_command(startup_report)
+    app.cli.add_command(import_report)
+    app.cli.add_command(database_cli)
@@ -1,7 +1,10 @@
 from flask import Blueprint, render_template
 from flask_login import login_required, current_user
-from datetime import date
-from app.models import Client, Assignment, Attendance
+from datetime import date, time
+from typing import NamedTuple, Optional
+from sqlalchemy import and_
+from app import db
+from app.models import Client, Assignment, Attendance, Employee
 from app.role_check import role_required
 
 # ==========================================================
@@ -9,6 +12,41 @@ from app.role_check import role_required
 # ==========================================================
 client_bp = Blueprint("client", __name__)
 
+
+class RosterEntry(NamedTuple):
+    """Satu karyawan yang ditugaskan ke client + absensinya pada tanggal tsb."""
+    employee_id: int
+    name: str
+    position: Optional[str]
+    job_type: Optional[str]
+    photo: Optional[str]
+    attendance_id: Optional[int]  # None → belum ada absen pada tanggal tsb
+    check_in: Optional[time]
+    check_out: Optional[time]
+    attendance_status: Optional[str]
+
+
+def client_roster(client_id, day):
+    """
+    Karyawan dengan assignment aktif di client ini + absensi tanggal `day`,
+    dalam satu query JOIN (index assignments(client_id, status) &
+    attendance(employee_id, date)) – tidak menyentuh data client lain.
+    """
+    rows = (
+        db.session.query(
+            Employee.id, Employee.name, Employee.position, Employee.job_type, Employee.photo,
+            Attendance.id, Attendance.check_in, Attendance.check_out, Attendance.status,
+        )
+        .select_from(Assignment)
+        .join(Employee, Employee.id == Assignment.employee_id)
+        .outerjoin(Attendance, and_(Attendance.employee_id == Employee.id, Attendance.date == day))
+        .filter(Assignment.client_id == client_id, Assignment.status == "aktif")
+        .order_by(Assignment.id)
+        .all()
+    )
+    return [RosterEntry(*row) for row in rows]
+
+
 # ==========================================================
 # 📊 DASHBOARD CLIENT (Role = client)
 # ==========================================================
@@ -22,19 +60,11 @@ def dashboard_client():
     beserta status kehadiran harian.
     """
     client = Client.query.filter_by(user_id=current_user.id).first_or_404()
-
-    # Assignment aktif → karyawan yang sedang bekerja untuk client ini
-    assignments = Assignment.query.filter_by(client_id=client.id, status="aktif").all()
-
-    # Kehadiran hari ini
-    attendance_today = {
-        a.employee_id: a for a in Attendance.query.filter_by(date=date.today()).all()
-    }
+    today = date.today()
 
     return render_template(
         "client/dashboard_client.html",
         client=client,
-        assignments=assignments,
-        attendance_today=attendance_today,
-        today=date.today(),
-    )
\ No newline at end of file
+        roster=client_roster(client.id, today),
+        today=today,
+    )
@@ -0,0 +1,134 @@
+# ==============================================================
+#  app/database.py – Konfigurasi engine database dari environment
+# ==============================================================
+#  DATABASE_URL menentukan database (default sqlite:///hrd_portal.db
+#  di folder instance). Opsi pool bisa diatur lewat DB_POOL_SIZE,
+#  DB_MAX_OVERFLOW, DB_POOL_TIMEOUT dan DB_POOL_RECYCLE.
+#
+#  Untuk SQLite, setiap koneksi baru di-set:
+#    journal_mode=WAL       → pembaca tidak memblokir penulis (dan
+#                             sebaliknya) antar worker gunicorn
+#    busy_timeout           → tunggu lock, bukan langsung
+#                             "database is locked"
+#    synchronous=NORMAL     → aman untuk WAL, fsync jauh lebih jarang
+#    foreign_keys=ON        → ON DELETE di model benar-benar berlaku
+#    mmap_size, cache_size  → baca halaman dari memori
+#  View yang membaca lalu menulis baris yang sama dari banyak worker
+#  (absen masuk/pulang, input absensi HR) diberi @immediate_transaction:
+#  transaksi POST-nya dimulai dengan BEGIN IMMEDIATE, sehingga request
+#  yang bersamaan antre lewat busy_timeout, bukan gagal karena snapshot
+#  WAL-nya sudah basi. Request lain (login dengan hash password, upload
+#  foto) & pekerjaan di luar request tetap BEGIN biasa (deferred) agar
+#  tidak memegang satu-satunya lock tulis SQLite selama bekerja.
+# ==============================================================
+
+import os
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = "sqlite:///hrd_portal.db"
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def database_uri():
+    """URI database dari DATABASE_URL / SQLALCHEMY_DATABASE_URI."""
+    uri = os.environ.get("DATABASE_URL") or os.environ.get("SQLALCHEMY_DATABASE_URI") or DEFAULT_DATABASE_URI
+    # Render/Heroku masih memberi skema lama "postgres://"
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def is_sqlite(uri):
+    return uri.startswith("sqlite")
+
+
+def _is_memory_sqlite(uri):
+    return uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS sesuai jenis database."""
+    if is_sqlite(uri):
+        if _is_memory_sqlite(uri):
+            return {}
+        return {
+            # Per worker cukup beberapa koneksi (thread request + antrean foto)
+            "pool_size": _env_int("DB_POOL_SIZE", 5),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 5),
+            "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+            # Lock ditangani busy_timeout; driver tidak perlu menunggu sendiri
+            "connect_args": {"timeout": 0, "check_same_thread": False},
+        }
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas(app):
+    """PRAGMA yang dijalankan di setiap koneksi SQLite baru."""
+    pragmas = {
+        "busy_timeout": app.config["SQLITE_BUSY_TIMEOUT_MS"],
+        "synchronous": app.config["SQLITE_SYNCHRONOUS"],
+        "foreign_keys": "ON",
+        "cache_size": -app.config["SQLITE_CACHE_SIZE_KB"],  # negatif = KiB
+    }
+    if not _is_memory_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        pragmas = {
+            "journal_mode": app.config["SQLITE_JOURNAL_MODE"],
+            "mmap_size": app.config["SQLITE_MMAP_SIZE_MB"] * 1024 * 1024,
+            **pragmas,
+        }
+    return pragmas
+
+
+def immediate_transaction(f):
+    """
+    Transaksi request tulis (POST, dst.) di view ini memakai BEGIN IMMEDIATE.
+    Pasang tepat di bawah @route agar berlaku sebelum query pertama
+    (termasuk user_loader di @login_required).
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if request.method in WRITE_METHODS:
+            g.sqlite_immediate = True
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def init_database(app, db):
+    """Pasang PRAGMA & mode transaksi SQLite pada engine aplikasi."""
+    if not is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        return
+    pragmas = sqlite_pragmas(app)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Matikan BEGIN otomatis pysqlite; transaksi diatur di "begin" di bawah
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(connection):
+        if has_request_context() and g.get("sqlite_immediate"):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            connection.exec_driver_sql("BEGIN")
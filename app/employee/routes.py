@@ -1,29 +1,61 @@
 # ============================================================
 # Import & Setup
 # ============================================================
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-import os, uuid, traceback, logging
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, g
+import traceback, logging
 from datetime import date, datetime
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from functools import wraps
-from app.hr.routes import hr_bp
+from app.hr.routes import hr_bp, ALLOWED_EXTENSIONS
 from app import db
 from app.models import (
     Employee, Attendance, ActivityLog, Client,
-    Assignment, EmployeePersonalDetail
+    Assignment, EmployeePersonalDetail, EmployeeDocument
 )
 from app.role_check import role_required
+from app.query_budget import query_budget
+from app.database import immediate_transaction
+from app.query_filters import on_day
+from app.images import generate_variants
+from app.storage import (
+    store_upload, link_upload,
+    OWNER_EMPLOYEE_PHOTO, OWNER_EMPLOYEE_DOCUMENT,
+)
+from app.activity_photos import STATUS_PENDING, photo_queue, save_raw_photo
 
 employee_bp = Blueprint("employee", __name__)
 
+ACTIVITY_PHOTO_EXTENSIONS = {"jpg", "jpeg", "png"}
+
 # ============================================================
 # 🔒 Validasi Employee untuk setiap Request
 # ============================================================
+def current_employee():
+    """
+    Employee milik user yang login, dimuat SEKALI per request beserta
+    client dan absensi hari ini (satu query). Hasil disimpan di
+    g.employee & g.attendance_today; None jika akun tanpa data karyawan.
+    """
+    if "employee" not in g:
+        today = date.today()
+        row = (
+            db.session.query(Employee, Attendance)
+            .outerjoin(Attendance, and_(Attendance.employee_id == Employee.id, Attendance.date == today))
+            .options(joinedload(Employee.client))
+            .filter(Employee.user_id == current_user.id)
+            .first()
+        )
+        g.employee, g.attendance_today = row if row else (None, None)
+    return g.employee
+
+
 def ensure_employee_exists(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        emp = Employee.query.filter_by(user_id=current_user.id).first()
+        emp = current_employee()
         if not emp:
             flash("⚠️ Akun ini tidak memiliki data karyawan.", "warning")
             return redirect(url_for("auth.logout"))
@@ -43,19 +75,25 @@ def employee_check():
 @login_required
 @role_required("employee")
 @ensure_employee_exists
+@query_budget(3)
 def dashboard_employee():
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    employee = g.employee
     today = date.today()
 
-    attendance_today = Attendance.query.filter_by(
-        employee_id=employee.id, date=today
-    ).first()
+    # Hanya log hari ini (index employee_id + created_at), bukan seluruh riwayat
+    today_logs = (
+        ActivityLog.query
+        .filter(ActivityLog.employee_id == employee.id, on_day(ActivityLog.created_at, today))
+        .order_by(ActivityLog.created_at.desc())
+        .all()
+    )
 
     return render_template(
         "employee/dashboard_employee.html",
         employee=employee,
         today=today,
-        attendance_today=attendance_today,
+        attendance_today=g.attendance_today,
+        today_logs=today_logs,
     )
 
 
@@ -68,7 +106,7 @@ def dashboard_employee():
 @ensure_employee_exists
 def upload_activity():
     try:
-        employee = Employee.query.filter_by(user_id=current_user.id).first()
+        employee = g.employee
 
         description = request.form.get("description")
         latitude_val = request.form.get("latitude")
@@ -84,16 +122,12 @@ def upload_activity():
         latitude = safe_float(latitude_val)
         longitude = safe_float(longitude_val)
 
+        # Foto hanya disimpan mentah; decode/resize/EXIF dikerjakan antrean background
         file = request.files.get("photo")
-        stored_path = None
+        raw_name = None
         if file and file.filename:
-            upload_folder = os.path.join(current_app.root_path, "static", "uploads")
-            os.makedirs(upload_folder, exist_ok=True)
-            ext = file.filename.rsplit(".", 1)[1].lower()
-            if ext in {"jpg", "jpeg", "png"}:
-                filename = secure_filename(f"{uuid.uuid4()}.{ext}")
-                file.save(os.path.join(upload_folder, filename))
-                stored_path = f"uploads/{filename}"
+            if "." in file.filename and file.filename.rsplit(".", 1)[1].lower() in ACTIVITY_PHOTO_EXTENSIONS:
+                raw_name = save_raw_photo(file)
             else:
                 flash("⚠️ Format foto tidak diperbolehkan (hanya JPG/PNG).", "warning")
 
@@ -102,11 +136,14 @@ def upload_activity():
             description=description,
             latitude=latitude,
             longitude=longitude,
-            image=stored_path,
+            image_status=STATUS_PENDING if raw_name else None,
+            image_raw=raw_name,
             created_at=datetime.now(),
         )
         db.session.add(new_log)
         db.session.commit()
+        if raw_name:
+            photo_queue.submit(new_log.id)
         flash("✅ Aktivitas harian berhasil disimpan.", "success")
 
     except Exception as e:
@@ -121,33 +158,41 @@ def upload_activity():
 # ⏱️ ABSENSI (Clock In / Clock Out)
 # ============================================================
 @employee_bp.route("/do_attendance", methods=["POST"])
+@immediate_transaction
 @login_required
 @role_required("employee")
 @ensure_employee_exists
 def do_attendance():
     today = date.today()
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    employee = g.employee
     action = request.form.get("action")
     current_time = datetime.now().time()
 
-    attendance = Attendance.query.filter_by(
-        employee_id=employee.id, date=today
-    ).first()
+    attendance = g.attendance_today
 
     if not attendance:
         attendance = Attendance(employee_id=employee.id, date=today, status="hadir")
         db.session.add(attendance)
-        db.session.commit()
 
+    message = None
     if action == "clock_in" and not attendance.check_in:
         attendance.check_in = current_time
-        flash("✅ Absen masuk berhasil!", "success")
+        message = ("✅ Absen masuk berhasil!", "success")
 
     elif action == "clock_out" and not attendance.check_out:
         attendance.check_out = current_time
-        flash("👋 Absen pulang berhasil!", "info")
+        message = ("👋 Absen pulang berhasil!", "info")
+
+    try:
+        # Ringkasan harian ikut diperbarui saat flush (app/stats.py)
+        db.session.commit()
+    except IntegrityError:
+        # Request lain (double tap) sudah membuat absensi hari ini lebih dulu
+        db.session.rollback()
+        message = ("⚠️ Absensi sedang diproses, silakan cek kembali.", "warning")
 
-    db.session.commit()
+    if message:
+        flash(*message)
     return redirect(url_for("employee.dashboard_employee"))
 
 
@@ -237,31 +282,27 @@ def edit_employee(id):
         # ==================================================
         # F. FOTO PROFIL
         # ==================================================
-        file_photo = request.files.get('photo')
-        if file_photo and allowed_file(file_photo.filename):
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            ext = file_photo.filename.rsplit('.', 1)[1].lower()
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            file_photo.save(os.path.join(UPLOAD_FOLDER, filename))
-            employee.photo = filename
+        stored_photo = store_upload(request.files.get('photo'), ALLOWED_EXTENSIONS)
+        if stored_photo:
+            generate_variants(stored_photo.name)
+            employee.photo = stored_photo.name
+            link_upload(stored_photo, OWNER_EMPLOYEE_PHOTO, employee.id)
 
         # ==================================================
         # G. DOKUMEN TAMBAHAN
         # ==================================================
         doc_fields = {"ktp": "KTP", "ijazah": "Ijazah"}
         for field_name, label in doc_fields.items():
-            file_doc = request.files.get(field_name)
-            if file_doc and allowed_file(file_doc.filename):
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                ext = file_doc.filename.rsplit('.', 1)[1].lower()
-                fname = f"{uuid.uuid4().hex}.{ext}"
-                file_doc.save(os.path.join(UPLOAD_FOLDER, fname))
+            stored_doc = store_upload(request.files.get(field_name), ALLOWED_EXTENSIONS)
+            if stored_doc:
                 new_doc = EmployeeDocument(
                     employee_id=employee.id,
                     document_type=label,
-                    file_path=f"uploads/{fname}",
+                    file_path=stored_doc.name,
                 )
                 db.session.add(new_doc)
+                db.session.flush()
+                link_upload(stored_doc, OWNER_EMPLOYEE_DOCUMENT, new_doc.id)
 
         # ==================================================
         # H. SIMPAN PERUBAHAN
@@ -1,21 +1,18 @@
-import os, uuid, traceback
+import traceback
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from app.models import db, Employee, EmployeeDocument, EmployeePersonalDetail
 from app.role_check import role_required   # ✅ untuk batasi akses HR/Admin
+from app.images import generate_variants
+from app.storage import store_upload, link_upload, OWNER_EMPLOYEE_PHOTO, OWNER_EMPLOYEE_DOCUMENT
+from app.exports import employee_export_rows, iter_xlsx, EMPLOYEE_EXPORT_HEADER, XLSX_MIMETYPE
 
 employee_input_bp = Blueprint('employee_input_bp', __name__)
 
-UPLOAD_FOLDER = 'app/static/uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
 # ---------- Fungsi bantu ----------
-def allowed_file(filename):
-    """Cek ekstensi file"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
 def to_int(value):
     """Konversi aman string ke int"""
     try:
@@ -104,19 +101,17 @@ def add_employee():
             db.session.add(detail)
 
             # ---------- Upload dokumen ----------
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
             for key in ('ijazah', 'ktp', 'foto'):
-                file = request.files.get(key)
-                if file and allowed_file(file.filename):
-                    filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-                    file.save(os.path.join(UPLOAD_FOLDER, filename))
-
+                stored = store_upload(request.files.get(key), ALLOWED_EXTENSIONS)
+                if stored:
                     doc = EmployeeDocument(
                         employee_id=new_employee.id,
                         document_type=key.upper(),
-                        file_path=f"static/uploads/{filename}"
+                        file_path=stored.name
                     )
                     db.session.add(doc)
+                    db.session.flush()
+                    link_upload(stored, OWNER_EMPLOYEE_DOCUMENT, doc.id)
 
             # ---------- Simpan ke database ----------
             db.session.commit()
@@ -159,6 +154,17 @@ def view_employee(emp_id):
 @login_required
 @role_required('admin', 'hr')
 def list_employees():
+    # ?format=xlsx → unduh master data sebagai Excel (di-stream per batch)
+    if request.args.get('format') == 'xlsx':
+        rows = employee_export_rows()
+        output = Response(
+            stream_with_context(iter_xlsx(rows, header=EMPLOYEE_EXPORT_HEADER, sheet_name='Data Personil')),
+            mimetype=XLSX_MIMETYPE,
+        )
+        filename = f"Data_Personil_{datetime.now().strftime('%d-%m-%Y')}.xlsx"
+        output.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return output
+
     employees = Employee.query.join(EmployeePersonalDetail).all()
     return render_template('employee/list_employees.html', employees=employees)
 # ===============================================================
@@ -212,12 +218,11 @@ def employee_self_input():
             detail.num_children = to_int(request.form.get('jumlah_anak'))
 
             # Upload foto (opsional)
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            foto = request.files.get('foto')
-            if foto and allowed_file(foto.filename):
-                filename = secure_filename(f"{uuid.uuid4()}_{foto.filename}")
-                foto.save(os.path.join(UPLOAD_FOLDER, filename))
-                employee.photo = f"uploads/{filename}"
+            stored = store_upload(request.files.get('foto'), ALLOWED_EXTENSIONS)
+            if stored:
+                generate_variants(stored.name)
+                employee.photo = stored.name
+                link_upload(stored, OWNER_EMPLOYEE_PHOTO, employee.id)
 
             db.session.commit()
             flash("✅ Data Anda berhasil diperbarui!", "success")
@@ -0,0 +1,254 @@
+# ==============================================================
+#  app/exports.py – Export laporan secara streaming (CSV & XLSX)
+# ==============================================================
+#  Data dibaca per batch (yield_per) lewat satu query JOIN dan
+#  ditulis bertahap, sehingga memori worker tetap kecil berapapun
+#  jumlah baris yang diekspor.
+# ==============================================================
+
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from app import db
+from app.models import Attendance, Employee, Client, EmployeePersonalDetail
+
+# Jumlah baris per batch query & per potongan output
+EXPORT_BATCH_SIZE = 500
+
+ATTENDANCE_EXPORT_HEADER = ['Tanggal', 'Nama Karyawan', 'Posisi', 'Client', 'Jam Masuk', 'Jam Pulang', 'Status']
+EMPLOYEE_EXPORT_HEADER = ['No', 'Nama Lengkap', 'NIK', 'Posisi / Jabatan', 'Penempatan (Client)', 'Gender', 'Pendidikan', 'Status']
+
+
+def attendance_export_rows(start, end, client_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Generator baris laporan absensi untuk tanggal start..end (inklusif).
+    Karyawan & client ikut di-JOIN → tidak ada lazy load per baris.
+    """
+    query = (
+        db.session.query(
+            Attendance.date,
+            Attendance.check_in,
+            Attendance.check_out,
+            Attendance.status,
+            Employee.name,
+            Employee.position,
+            Client.name,
+        )
+        .outerjoin(Employee, Employee.id == Attendance.employee_id)
+        .outerjoin(Client, Client.id == Employee.client_id)
+        .filter(Attendance.date >= start, Attendance.date <= end)
+        .order_by(Attendance.date.desc(), Attendance.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    if client_id:
+        query = query.filter(Employee.client_id == client_id)
+
+    for att_date, check_in, check_out, status, emp_name, emp_pos, client_name in query:
+        yield [
+            att_date.strftime('%d-%m-%Y'),
+            emp_name or "Deleted User",
+            emp_pos or "-",
+            client_name or "-",
+            check_in.strftime('%H:%M') if check_in else "-",
+            check_out.strftime('%H:%M') if check_out else "-",
+            (status or "-").upper(),
+        ]
+
+
+def employee_export_rows(batch_size=EXPORT_BATCH_SIZE):
+    """Generator baris master data personil (sama dengan tabel list_employees)."""
+    query = (
+        db.session.query(
+            Employee.name,
+            Employee.position,
+            Employee.status,
+            EmployeePersonalDetail.full_name,
+            EmployeePersonalDetail.nik,
+            EmployeePersonalDetail.gender,
+            EmployeePersonalDetail.education,
+            Client.name,
+        )
+        .join(EmployeePersonalDetail, EmployeePersonalDetail.employee_id == Employee.id)
+        .outerjoin(Client, Client.id == Employee.client_id)
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    for no, (name, position, status, full_name, nik, gender, education, client_name) in enumerate(query, start=1):
+        yield [
+            no,
+            full_name or name,
+            nik or "-",
+            position or "-",
+            client_name or "-",
+            gender or "-",
+            education or "-",
+            (status or "-").capitalize(),
+        ]
+
+
+def iter_csv(rows, header=None, chunk_rows=EXPORT_BATCH_SIZE):
+    """Ubah iterable baris menjadi potongan teks CSV (untuk Response streaming)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if header:
+        writer.writerow(header)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+
+# ==============================================================
+# 📗 XLSX STREAMING WRITER
+# ==============================================================
+#  File .xlsx = ZIP berisi beberapa XML. Worksheet ditulis baris per
+#  baris ke entry ZIP (inline string, tanpa sharedStrings), dan byte
+#  ZIP yang sudah jadi langsung diteruskan ke response. Tidak ada
+#  workbook yang dibangun di memori.
+# ==============================================================
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Style 0 = normal, style 1 = tebal (untuk header)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# Karakter kontrol yang tidak sah di XML 1.0
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ChunkSink(io.RawIOBase):
+    """Target tulis tanpa seek untuk ZipFile; byte ditampung sampai diambil."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index):
+    """0 → A, 25 → Z, 26 → AA, ..."""
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _xlsx_row(row_number, values, style=0):
+    cells = []
+    style_attr = f' s="{style}"' if style else ''
+    for col, value in enumerate(values):
+        ref = f'{_column_letter(col)}{row_number}'
+        if value is None or value == '':
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>')
+        else:
+            cells.append(f'<c r="{ref}"{style_attr}><v>{value}</v></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def iter_xlsx(rows, header=None, sheet_name='Sheet1', chunk_rows=EXPORT_BATCH_SIZE):
+    """
+    Ubah iterable baris menjadi potongan byte file .xlsx (untuk Response streaming).
+    Memori tetap konstan: hanya satu batch baris yang ditahan setiap saat.
+    """
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content)
+        zf.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield sink.drain()
+
+        with zf.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            row_number = 0
+            if header:
+                row_number += 1
+                sheet.write(_xlsx_row(row_number, header, style=1).encode('utf-8'))
+
+            for row in rows:
+                row_number += 1
+                sheet.write(_xlsx_row(row_number, row).encode('utf-8'))
+                if row_number % chunk_rows == 0:
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield sink.drain()
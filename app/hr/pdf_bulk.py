@@ -0,0 +1,289 @@
+# ============================================================
+#  app/hr/pdf_bulk.py – Cetak massal PDF biodata (ZIP streaming)
+# ============================================================
+#  xhtml2pdf murni CPU dan memegang GIL, jadi render dijalankan
+#  di process pool dengan jumlah worker terbatas. HTML tetap
+#  dirender di proses web (butuh app context & database), hanya
+#  konversi HTML → PDF yang dikirim ke pool. Setiap PDF yang
+#  selesai langsung ditulis ke ZIP dan di-stream ke browser.
+#
+#  Status job disimpan sebagai file JSON di instance/ sehingga
+#  URL status bisa dibaca dari worker gunicorn mana pun. Job baru
+#  BERJALAN saat URL download dibuka (render mengikuti stream);
+#  sebelum itu statusnya "pending". Setiap job baru dibuat, file
+#  job selesai/batal/tak pernah diunduh yang lebih tua dari
+#  BULK_PDF_JOB_TTL_HOURS dihapus.
+#
+#  Satu job hanya memegang ±2 × BULK_PDF_WORKERS render sekaligus
+#  di pool bersama, sehingga PDF tunggal dari request lain tetap
+#  kebagian giliran walau ada job 1000 karyawan.
+#
+#  Renderer dipilih lewat config PDF_RENDERER: "xhtml2pdf"
+#  (template HTML) atau "reportlab" (layout langsung, lihat
+#  pdf_reportlab.py). Keduanya lewat biodata_render_task().
+#  ReportLab / xhtml2pdf di-import saat render pertama, bukan saat
+#  worker start.
+# ============================================================
+
+import io
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime
+
+from flask import current_app, render_template
+from sqlalchemy.orm import selectinload
+
+from app.exports import ChunkSink
+from app.images import DEFAULT_PHOTO, upload_name, upload_path
+from app.hr.pdf_cache import biodata_cache_key, get_pdf_cache, template_version
+from app.models import Employee
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# 🧮 Render di process pool
+# ------------------------------------------------------------
+def render_pdf_bytes(html):
+    """HTML → byte PDF (dijalankan di proses worker). None jika gagal."""
+    from xhtml2pdf import pisa
+
+    result = io.BytesIO()
+    pdf = pisa.pisaDocument(io.BytesIO(html.encode("UTF-8")), result)
+    if pdf.err:
+        return None
+    return result.getvalue()
+
+
+def biodata_renderer():
+    """Nama renderer PDF biodata yang aktif ("xhtml2pdf" / "reportlab")."""
+    return current_app.config["PDF_RENDERER"]
+
+
+def biodata_layout_version(template_name, renderer=None):
+    """Identitas renderer + versi layout (bagian dari kunci cache PDF)."""
+    renderer = renderer or biodata_renderer()
+    if renderer == "reportlab":
+        from app.hr.pdf_reportlab import LAYOUT_VERSION
+        return f"reportlab:{LAYOUT_VERSION}"
+    return f"xhtml2pdf:{template_version(template_name)}"
+
+
+def biodata_render_task(employee, photo_path, now, template_name, renderer=None):
+    """
+    (fungsi, argumen) untuk merender PDF biodata. Argumennya data biasa
+    (picklable) sehingga bisa dipanggil langsung atau dikirim ke process pool.
+    """
+    renderer = renderer or biodata_renderer()
+    if renderer == "reportlab":
+        from app.hr.pdf_reportlab import biodata_fields, render_biodata_reportlab
+        return render_biodata_reportlab, (biodata_fields(employee), photo_path, now)
+    html = render_template(template_name, employee=employee, now=now, photo_path=photo_path)
+    return render_pdf_bytes, (html,)
+
+
+def get_executor():
+    """Process pool bersama per worker web (dibuat saat pertama dipakai)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _executor = ProcessPoolExecutor(
+                max_workers=current_app.config["BULK_PDF_WORKERS"],
+                # spawn: aman dipakai dari proses web yang memiliki thread
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def biodata_photo_path(employee):
+    """Path absolut foto karyawan untuk template PDF (None jika default)."""
+    if employee.photo and upload_name(employee.photo) != DEFAULT_PHOTO:
+        return upload_path(employee.photo)
+    return None
+
+
+def biodata_filename(employee):
+    return f"Biodata_{employee.name.replace(' ', '_')}.pdf"
+
+
+# ------------------------------------------------------------
+# 📋 Status job (file JSON)
+# ------------------------------------------------------------
+def _job_path(job_id):
+    return os.path.join(current_app.config["BULK_PDF_JOB_DIR"], f"{job_id}.json")
+
+
+def save_job(job):
+    path = _job_path(job["id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(job, fh)
+    os.replace(tmp_path, path)
+
+
+def load_job(job_id):
+    """Data job atau None jika tidak ada / id tidak valid."""
+    try:
+        uuid.UUID(job_id)
+        with open(_job_path(job_id)) as fh:
+            return json.load(fh)
+    except (ValueError, OSError):
+        return None
+
+
+# Job yang sudah tidak berjalan → boleh dihapus setelah TTL
+_STALE_STATES = ("pending", "finished", "cancelled")
+
+
+def prune_jobs(max_age_hours=None):
+    """
+    Hapus file job selesai / batal / tak pernah diunduh yang lebih tua
+    dari max_age_hours (default BULK_PDF_JOB_TTL_HOURS). Mengembalikan jumlahnya.
+    """
+    if max_age_hours is None:
+        max_age_hours = current_app.config["BULK_PDF_JOB_TTL_HOURS"]
+    job_dir = current_app.config["BULK_PDF_JOB_DIR"]
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(job_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            with open(entry.path) as fh:
+                state = json.load(fh).get("state")
+            if state in _STALE_STATES:
+                os.remove(entry.path)
+                removed += 1
+        except (OSError, ValueError):
+            continue  # dihapus / sedang ditulis worker lain
+    return removed
+
+
+def create_job(employee_ids, label):
+    """Simpan job baru (state "pending" sampai URL download dibuka)."""
+    prune_jobs()
+    job = {
+        "id": uuid.uuid4().hex,
+        "label": label,
+        "employee_ids": employee_ids,
+        "total": len(employee_ids),
+        "done": 0,
+        "failed": 0,
+        "state": "pending",
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    save_job(job)
+    return job
+
+
+# ------------------------------------------------------------
+# 📦 ZIP streaming
+# ------------------------------------------------------------
+def iter_bulk_zip(job, template_name):
+    """
+    Generator byte ZIP untuk sebuah job (job berjalan selama generator ini
+    di-stream). PDF yang ada di cache langsung ditulis; sisanya dirender
+    paralel dalam jendela terbatas dan ditulis sesuai urutan selesai.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    cache = get_pdf_cache()
+    sink = ChunkSink()
+    job.update(state="running", done=0, failed=0, updated_at=time.time())
+    save_job(job)
+
+    def _progress(ok):
+        job["done" if ok else "failed"] += 1
+        job["updated_at"] = time.time()
+        save_job(job)
+
+    employees = (
+        Employee.query
+        .options(selectinload(Employee.personal_detail))
+        .filter(Employee.id.in_(job["employee_ids"]))
+        .order_by(Employee.id)
+        .all()
+    )
+    job["failed"] += job["total"] - len(employees)
+
+    now = datetime.now()
+    layout_version = biodata_layout_version(template_name)
+    # Render yang sedang di pool untuk job ini (sisanya menunggu giliran)
+    window = 2 * current_app.config["BULK_PDF_WORKERS"]
+    pending = {}
+
+    def _write_completed(zf, block):
+        """Tulis render yang selesai ke ZIP (block=True: tunggu minimal satu)."""
+        done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            employee_id, key, arcname = pending.pop(future)
+            try:
+                data = future.result()
+            except Exception as e:
+                current_app.logger.error(f"⚠️ Gagal render PDF karyawan {employee_id}: {e}")
+                data = None
+
+            if data is None:
+                _progress(False)
+                continue
+
+            cache.put(employee_id, key, data)
+            zf.writestr(arcname, data)
+            _progress(True)
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+            for employee in employees:
+                photo_path = biodata_photo_path(employee)
+                key = biodata_cache_key(employee, photo_path, layout_version, now.date())
+                arcname = f"{employee.id}_{biodata_filename(employee)}"
+
+                cached_path = cache.get(employee.id, key)
+                if cached_path:
+                    zf.write(cached_path, arcname)
+                    _progress(True)
+                    yield sink.drain()
+                    continue
+
+                while len(pending) >= window:
+                    _write_completed(zf, block=True)
+                    yield sink.drain()
+
+                render, args = biodata_render_task(employee, photo_path, now, template_name)
+                future = get_executor().submit(render, *args)
+                pending[future] = (employee.id, key, arcname)
+
+                # PDF yang sudah jadi langsung ikut di-stream
+                _write_completed(zf, block=False)
+                yield sink.drain()
+
+            while pending:
+                _write_completed(zf, block=True)
+                yield sink.drain()
+    except GeneratorExit:
+        # Unduhan dibatalkan / koneksi putus → hentikan render yang belum mulai
+        for future in pending:
+            future.cancel()
+        job.update(state="cancelled", updated_at=time.time())
+        save_job(job)
+        raise
+
+    job.update(state="finished", updated_at=time.time())
+    save_job(job)
+    yield sink.drain()
@@ -0,0 +1,164 @@
+# ============================================================
+#  app/hr/pdf_cache.py – Cache disk untuk PDF biodata karyawan
+# ============================================================
+#  Render xhtml2pdf butuh beberapa detik CPU. Hasilnya disimpan
+#  di disk dengan kunci = hash (data Employee, data
+#  EmployeePersonalDetail, file foto, renderer + versi layout,
+#  tanggal cetak). Jika salah satunya berubah, kunci ikut berubah sehingga
+#  entri lama otomatis tidak terpakai. Ukuran total dibatasi dan
+#  entri yang paling lama tidak dipakai dihapus lebih dulu (LRU).
+# ============================================================
+
+import hashlib
+import json
+import os
+import threading
+
+from flask import current_app
+
+# Versi format kunci; naikkan jika cara render berubah di luar template
+CACHE_FORMAT_VERSION = 1
+
+_template_digests = {}
+_evict_lock = threading.Lock()
+
+
+def _row_fingerprint(obj):
+    """Nilai seluruh kolom sebuah baris ORM (dalam bentuk string)."""
+    if obj is None:
+        return None
+    return {
+        column.key: None if getattr(obj, column.key) is None else str(getattr(obj, column.key))
+        for column in obj.__table__.columns
+    }
+
+
+def _file_fingerprint(path):
+    """Identitas file foto: path + ukuran + waktu modifikasi."""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None]
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def template_version(template_name):
+    """Hash isi template Jinja (di-memo per proses, dihitung ulang jika file berubah)."""
+    env = current_app.jinja_env
+    source, filename, _ = env.loader.get_source(env, template_name)
+    mtime = os.path.getmtime(filename) if filename else None
+
+    cached = _template_digests.get(template_name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    _template_digests[template_name] = (mtime, digest)
+    return digest
+
+
+def biodata_cache_key(employee, photo_path, layout_version, printed_on):
+    """
+    Kunci cache (hex) untuk PDF biodata seorang karyawan.
+    `layout_version` membedakan renderer & versi layout (lihat pdf_bulk.biodata_layout_version).
+    """
+    payload = json.dumps(
+        [
+            CACHE_FORMAT_VERSION,
+            _row_fingerprint(employee),
+            _row_fingerprint(employee.personal_detail),
+            _file_fingerprint(photo_path),
+            layout_version,
+            printed_on.isoformat(),
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """Penyimpanan file PDF berbasis kunci dengan batas ukuran (LRU)."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, owner_id, key):
+        return os.path.join(self.directory, f"{owner_id}_{key}.pdf")
+
+    def get(self, owner_id, key):
+        """Path file cache jika ada (dan tandai baru dipakai), selain itu None."""
+        path = self._path(owner_id, key)
+        try:
+            # mtime dipakai sebagai penanda "terakhir dipakai" untuk LRU
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def put(self, owner_id, key, data):
+        """Simpan PDF secara atomik, hapus versi lama milik owner yang sama."""
+        path = self._path(owner_id, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+
+        self.invalidate(owner_id, keep=key)
+        self.evict()
+        return path
+
+    def invalidate(self, owner_id, keep=None):
+        """Hapus semua entri milik owner_id (kecuali kunci `keep`)."""
+        prefix = f"{owner_id}_"
+        keep_name = f"{owner_id}_{keep}.pdf" if keep else None
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(".pdf") and entry.name != keep_name:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def evict(self):
+        """Hapus entri paling lama tidak dipakai sampai total ukuran <= max_bytes."""
+        with _evict_lock:
+            files = []
+            total = 0
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(files):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+def get_pdf_cache():
+    """PdfCache sesuai konfigurasi aplikasi (PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)."""
+    cache = current_app.extensions.get("pdf_cache")
+    if cache is None:
+        cache = PdfCache(
+            current_app.config["PDF_CACHE_DIR"],
+            current_app.config["PDF_CACHE_MAX_BYTES"],
+        )
+        current_app.extensions["pdf_cache"] = cache
+    return cache
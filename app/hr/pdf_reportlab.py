@@ -0,0 +1,351 @@
+# ============================================================
+#  app/hr/pdf_reportlab.py – PDF biodata langsung dengan ReportLab
+# ============================================================
+#  Layout yang sama dengan hr/pdf_bank_style.html, tetapi digambar
+#  langsung di canvas ReportLab: tanpa parsing HTML (html5lib),
+#  resolusi CSS, maupun layout engine xhtml2pdf. Dokumennya
+#  berformat tetap, jadi posisi setiap elemen cukup dihitung di sini.
+#
+#  Renderer hanya menerima data biasa (dict/str/datetime) sehingga
+#  bisa dijalankan di process pool cetak massal.
+#  Dipilih lewat konfigurasi PDF_RENDERER = "reportlab".
+# ============================================================
+
+import io
+
+from reportlab.lib.colors import HexColor, black
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfgen import canvas
+
+# Naikkan jika tampilan PDF diubah (ikut masuk ke kunci cache PDF)
+LAYOUT_VERSION = 1
+
+# 1px CSS = 0.75pt (sama dengan konversi xhtml2pdf)
+PX = 0.75
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN_X = 2 * cm
+MARGIN_Y = 1.5 * cm
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN_X
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_ITALIC = "Helvetica-Oblique"
+
+BODY_SIZE = 11 * PX
+LINE_HEIGHT = BODY_SIZE * 1.3
+
+NAVY = HexColor("#1a237e")
+GREY_TEXT = HexColor("#555555")
+GREY_NOTE = HexColor("#666666")
+GREY_FILL = HexColor("#e0e0e0")
+GREY_DOTS = HexColor("#999999")
+GREY_PLACEHOLDER = HexColor("#cccccc")
+
+COMPANY_NAME = "PT. HR PORTAL INDONESIA"
+COMPANY_ADDRESS = [
+    "Gedung Menara Sudirman Lt. 15",
+    "Jl. Jendral Sudirman Kav. 60, Jakarta Selatan 12190",
+    "Telp: (021) 520-1234 | Fax: (021) 520-5678",
+]
+FORM_CODE = "Formulir: HRD-01/EMP/2025"
+DISCLAIMER = (
+    "Dengan ini saya menyatakan bahwa keterangan tersebut di atas adalah benar, "
+    "lengkap, dan sesuai dengan keadaan yang sebenarnya."
+)
+
+# Kotak foto 3x4 (pojok kanan, sejajar bagian I)
+PHOTO_WIDTH = 113 * PX
+PHOTO_HEIGHT = 151 * PX
+
+
+# ------------------------------------------------------------
+# 📋 Data isian (dari model → data biasa)
+# ------------------------------------------------------------
+def _or_dash(value):
+    return str(value) if value else "-"
+
+
+def biodata_fields(employee):
+    """
+    Ambil isian biodata dari Employee (+ personal_detail) sebagai dict biasa.
+    Urutan & format sama persis dengan template pdf_bank_style.html.
+    """
+    detail = employee.personal_detail
+
+    def d(attr):
+        return getattr(detail, attr, None) if detail is not None else None
+
+    birth_date = d("birth_date")
+    return {
+        "name": employee.name,
+        "sections": [
+            ("I. DATA PRIBADI (PERSONAL DATA)", True, [
+                ("Nama Lengkap", employee.name),
+                ("NIK / ID Karyawan", _or_dash(d("nik"))),
+                ("Jabatan", _or_dash(employee.position)),
+                ("Tempat, Tgl Lahir", "{}, {}".format(
+                    d("birth_place") or "",
+                    birth_date.strftime("%d-%m-%Y") if birth_date else "-",
+                )),
+                ("Jenis Kelamin", _or_dash(d("gender"))),
+                ("Agama", "-"),
+                ("Status Pernikahan", _or_dash(d("marital_status"))),
+            ]),
+            ("II. ALAMAT & KONTAK (ADDRESS & CONTACT)", False, [
+                ("Alamat Sesuai KTP", _or_dash(d("address_ktp"))),
+                ("Alamat Domisili", _or_dash(d("address_current"))),
+                ("No. Handphone", _or_dash(d("phone"))),
+                ("Email Pribadi", _or_dash(d("email"))),
+            ]),
+            ("III. DATA PENDUKUNG (SUPPORTING DATA)", False, [
+                ("Pendidikan Terakhir", _or_dash(d("education"))),
+                ("No. BPJS Ketenagakerjaan", _or_dash(d("bpjs_ketenagakerjaan"))),
+                ("No. BPJS Kesehatan", _or_dash(d("bpjs_kesehatan"))),
+                ("Nama Kontak Darurat", "{} ({})".format(
+                    _or_dash(d("emergency_contact_name")),
+                    _or_dash(d("emergency_relation")),
+                )),
+                ("No. Telp Darurat", _or_dash(d("emergency_phone"))),
+            ]),
+        ],
+    }
+
+
+# ------------------------------------------------------------
+# 🖌️ Penggambar halaman
+# ------------------------------------------------------------
+class _BiodataPage:
+    """Canvas + kursor vertikal (y turun dari atas halaman)."""
+
+    def __init__(self, buffer, title):
+        self.c = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+        self.c.setTitle(title)
+        self.page = 1
+        self.y = PAGE_HEIGHT - MARGIN_Y
+
+    # --- utilitas ---
+    def _finish_page(self):
+        self.c.setFont(FONT, 9 * PX)
+        self.c.setFillColor(black)
+        self.c.drawRightString(PAGE_WIDTH - MARGIN_X, MARGIN_Y / 2, f"Halaman {self.page}")
+
+    def ensure_space(self, height):
+        """Pindah ke halaman baru jika sisa ruang kurang dari `height`."""
+        if self.y - height < MARGIN_Y:
+            self._finish_page()
+            self.c.showPage()
+            self.page += 1
+            self.y = PAGE_HEIGHT - MARGIN_Y
+
+    def text(self, x, text, font=FONT, size=BODY_SIZE, color=black, align="left"):
+        self.c.setFont(font, size)
+        self.c.setFillColor(color)
+        if align == "center":
+            self.c.drawCentredString(x, self.y, text)
+        elif align == "right":
+            self.c.drawRightString(x, self.y, text)
+        else:
+            self.c.drawString(x, self.y, text)
+
+    # --- blok layout ---
+    def header(self):
+        self.y -= 18 * PX
+        self.text(MARGIN_X, COMPANY_NAME, FONT_BOLD, 18 * PX, NAVY)
+        self.y -= 4 * PX
+        for line in COMPANY_ADDRESS:
+            self.y -= 9 * PX * 1.3
+            self.text(MARGIN_X, line, size=9 * PX, color=GREY_TEXT)
+        self.text(PAGE_WIDTH - MARGIN_X, FORM_CODE, size=10 * PX, align="right")
+
+        # Garis ganda ala kop surat
+        self.y -= 10 * PX
+        self.c.setStrokeColor(black)
+        self.c.setLineWidth(0.75)
+        self.c.line(MARGIN_X, self.y, PAGE_WIDTH - MARGIN_X, self.y)
+        self.c.line(MARGIN_X, self.y - 1.5, PAGE_WIDTH - MARGIN_X, self.y - 1.5)
+        self.y -= 20 * PX
+
+    def title(self, text):
+        size = 14 * PX
+        self.y -= size
+        self.c.setFont(FONT_BOLD, size)
+        self.c.setFillColor(black)
+        # letter-spacing 1px → charSpace
+        width = self.c.stringWidth(text, FONT_BOLD, size) + PX * (len(text) - 1)
+        x = (PAGE_WIDTH - width) / 2
+        self.c.saveState()  # charSpace tidak boleh terbawa ke teks berikutnya
+        obj = self.c.beginText(x, self.y)
+        obj.setFont(FONT_BOLD, size)
+        obj.setCharSpace(PX)
+        obj.textOut(text)
+        self.c.drawText(obj)
+        self.c.restoreState()
+        self.c.setLineWidth(0.6)
+        self.c.line(x, self.y - 1.5, x + width, self.y - 1.5)
+        self.y -= 25 * PX
+
+    def section_header(self, text):
+        height = BODY_SIZE + 8 * PX + 4
+        self.ensure_space(15 * PX + height + LINE_HEIGHT * 2)
+        self.y -= 15 * PX
+        self.c.setFillColor(GREY_FILL)
+        self.c.setStrokeColor(black)
+        self.c.setLineWidth(0.75)
+        self.c.rect(MARGIN_X, self.y - height, CONTENT_WIDTH, height, stroke=1, fill=1)
+        self.y -= height - 4 * PX - 2
+        self.text(MARGIN_X + 8 * PX, text.upper(), FONT_BOLD)
+        self.y -= 4 * PX + 2 + 8 * PX
+
+    def data_table(self, rows, width):
+        label_w, sep_w = width * 0.30, width * 0.02
+        value_x = MARGIN_X + label_w + sep_w + 5 * PX
+        value_w = width - label_w - sep_w - 5 * PX
+
+        for label, value in rows:
+            lines = simpleSplit(str(value), FONT, BODY_SIZE, value_w) or [""]
+            label_lines = simpleSplit(label, FONT_BOLD, BODY_SIZE, label_w) or [""]
+            row_height = max(len(lines), len(label_lines)) * LINE_HEIGHT + 6 * PX
+            self.ensure_space(row_height)
+
+            top = self.y
+            for i, line in enumerate(label_lines):
+                self.y = top - 3 * PX - BODY_SIZE - i * LINE_HEIGHT
+                self.text(MARGIN_X, line, FONT_BOLD)
+            self.y = top - 3 * PX - BODY_SIZE
+            self.text(MARGIN_X + label_w + sep_w / 2, ":", align="center")
+            for i, line in enumerate(lines):
+                self.y = top - 3 * PX - BODY_SIZE - i * LINE_HEIGHT
+                self.text(value_x, line)
+
+            # Garis titik-titik ala form isian
+            bottom = top - row_height
+            self.c.setStrokeColor(GREY_DOTS)
+            self.c.setLineWidth(0.75)
+            self.c.setDash(0.75, 1.5)
+            self.c.line(value_x - 5 * PX, bottom, MARGIN_X + width, bottom)
+            self.c.setDash()
+            self.y = bottom
+
+    def photo(self, top, photo_path):
+        x = PAGE_WIDTH - MARGIN_X - PHOTO_WIDTH
+        y = top - PHOTO_HEIGHT
+        self.c.setStrokeColor(black)
+        self.c.setLineWidth(0.75)
+        self.c.rect(x, y, PHOTO_WIDTH, PHOTO_HEIGHT, stroke=1, fill=0)
+
+        inner = 3 * PX
+        ix, iy = x + inner, y + inner
+        iw, ih = PHOTO_WIDTH - 2 * inner, PHOTO_HEIGHT - 2 * inner
+        image = None
+        if photo_path:
+            try:
+                # Hanya baca header untuk ukuran; drawImage(path) menanam JPEG
+                # apa adanya tanpa decode piksel
+                img_w, img_h = ImageReader(photo_path).getSize()
+                image = photo_path
+            except Exception:
+                image = None
+
+        if image is None:
+            self.c.setFont(FONT, 10 * PX)
+            self.c.setFillColor(GREY_PLACEHOLDER)
+            self.c.drawCentredString(x + PHOTO_WIDTH / 2, top - 60 * PX - 10 * PX, "FOTO")
+            self.c.drawCentredString(x + PHOTO_WIDTH / 2, top - 60 * PX - 10 * PX * 2.3, "3 x 4")
+            return
+
+        # object-fit: cover → skala terbesar, sisanya dipotong (clip)
+        scale = max(iw / img_w, ih / img_h)
+        draw_w, draw_h = img_w * scale, img_h * scale
+        self.c.saveState()
+        clip = self.c.beginPath()
+        clip.rect(ix, iy, iw, ih)
+        self.c.clipPath(clip, stroke=0, fill=0)
+        self.c.drawImage(image, ix + (iw - draw_w) / 2, iy + (ih - draw_h) / 2, draw_w, draw_h)
+        self.c.restoreState()
+
+    def paragraph(self, text, font, size, color, top_margin):
+        lines = simpleSplit(text, font, size, CONTENT_WIDTH)
+        self.ensure_space(top_margin + len(lines) * size * 1.3)
+        self.y -= top_margin
+        for line in lines:
+            self.y -= size * 1.3
+            self.text(MARGIN_X, line, font, size, color)
+
+    def signatures(self, name, printed_on):
+        block_height = 50 * PX + LINE_HEIGHT * 3 + 70 * PX + LINE_HEIGHT
+        self.ensure_space(block_height)
+        self.y -= 50 * PX
+        top = self.y
+
+        # Kiri: HR Department (lebar 30%)
+        left_w = CONTENT_WIDTH * 0.30
+        left_cx = MARGIN_X + left_w / 2
+        self.y = top - LINE_HEIGHT * 2
+        self.text(left_cx, "Mengetahui,", align="center")
+        self.y -= LINE_HEIGHT
+        self.text(left_cx, "HR Department", FONT_BOLD, align="center")
+        left_line = self.y - 70 * PX
+        self.c.setStrokeColor(black)
+        self.c.setLineWidth(0.75)
+        self.c.line(MARGIN_X, left_line, MARGIN_X + left_w, left_line)
+        self.y = left_line - LINE_HEIGHT
+        self.text(left_cx, "( HR Manager )", align="center")
+
+        # Kanan: yang menyatakan (lebar 35%, rata kanan)
+        right_w = CONTENT_WIDTH * 0.35
+        right_x = PAGE_WIDTH - MARGIN_X - right_w
+        right_cx = right_x + right_w / 2
+        self.y = top - BODY_SIZE
+        self.text(right_cx, f"Jakarta, {printed_on.strftime('%d %B %Y')}", align="center")
+        self.y -= LINE_HEIGHT
+        self.text(right_cx, "Yang Menyatakan,", align="center")
+        right_line = self.y - 70 * PX
+        self.c.line(right_x, right_line, right_x + right_w, right_line)
+        self.y = right_line - LINE_HEIGHT
+
+        bold_name = name or ""
+        parts = [("( ", FONT), (bold_name, FONT_BOLD), (" )", FONT)]
+        total = sum(self.c.stringWidth(t, f, BODY_SIZE) for t, f in parts)
+        x = right_cx - total / 2
+        self.c.setFillColor(black)
+        for t, f in parts:
+            self.c.setFont(f, BODY_SIZE)
+            self.c.drawString(x, self.y, t)
+            x += self.c.stringWidth(t, f, BODY_SIZE)
+
+        self.y = min(self.y, left_line - LINE_HEIGHT)
+
+    def finish(self):
+        self._finish_page()
+        self.c.save()
+
+
+# ------------------------------------------------------------
+# 🖨️ Render
+# ------------------------------------------------------------
+def render_biodata_reportlab(fields, photo_path, now):
+    """Data hasil biodata_fields() → byte PDF biodata (layout bank style)."""
+    buffer = io.BytesIO()
+    page = _BiodataPage(buffer, f"Biodata Karyawan - {fields['name']}")
+
+    page.header()
+    page.title("BIODATA KARYAWAN")
+
+    for title, beside_photo, rows in fields["sections"]:
+        page.section_header(title)
+        if beside_photo:
+            # Dibatasi 70% lebar agar tidak menabrak foto
+            top = page.y
+            page.data_table(rows, CONTENT_WIDTH * 0.70)
+            page.photo(top, photo_path)
+            page.y = min(page.y, top - PHOTO_HEIGHT)
+        else:
+            page.data_table(rows, CONTENT_WIDTH)
+
+    page.paragraph(DISCLAIMER, FONT_ITALIC, 8 * PX, GREY_NOTE, 20 * PX)
+    page.signatures(fields["name"], now)
+    page.finish()
+    return buffer.getvalue()
@@ -1,40 +1,115 @@
-import os, uuid
-import csv
-import io
+import calendar
 import random
 import string
-from datetime import date, datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, current_app, jsonify
+from datetime import date, datetime, timedelta
+from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, abort, current_app, jsonify, Response, stream_with_context, send_file
 from flask_login import login_required
-from sqlalchemy import desc, extract, func
-from app.models import Employee, Client, Attendance, Assignment, User, ActivityLog, EmployeePersonalDetail, EmployeeDocument
+from sqlalchemy import and_, desc, func, or_
+from sqlalchemy.exc import IntegrityError
+from app.models import Employee, Client, Attendance, Assignment, User, ActivityLog, EmployeePersonalDetail, EmployeeDocument, normalize_job_type
 from app import db
 from app.role_check import role_required
-from xhtml2pdf import pisa
+from app.database import immediate_transaction
+from app.query_filters import on_day, within_days
+from app.cache import TTLCache, data_version, watch_models
+from app.identity import forget_user
+from app.images import generate_variants, upload_url
+from app.storage import store_upload, link_upload, OWNER_EMPLOYEE_PHOTO, OWNER_EMPLOYEE_DOCUMENT
+from app.exports import attendance_export_rows, iter_csv, iter_xlsx, ATTENDANCE_EXPORT_HEADER, XLSX_MIMETYPE
+from app.hr.pdf_bulk import create_job, load_job, iter_bulk_zip, biodata_layout_version, biodata_photo_path, biodata_render_task
+from app.hr.pdf_cache import biodata_cache_key, get_pdf_cache
+from app.stats import attendance_counts, daily_attendance_range
 
 # ============================================================
 # 🔧 KONFIGURASI BLUEPRINT
 # ============================================================
 hr_bp = Blueprint('hr', __name__)
 
-UPLOAD_FOLDER = os.path.join('app', 'static', 'uploads')
+PDF_TEMPLATE = 'hr/pdf_bank_style.html'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
-def allowed_file(filename):
-    return (
-        '.' in filename
-        and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-    )
-
 # ============================================================
 # ✳️  KELOLA KARYAWAN
 # ============================================================
+EMPLOYEE_CARD_PAGE_SIZE = 48
+EMPLOYEE_STATUSES = [('aktif', 'Aktif'), ('standby', 'Standby'), ('resigned', 'Non-Aktif / Resigned')]
+JOB_TYPE_CHOICES = [('security', 'Security'), ('cleaning', 'Cleaning'), ('driver', 'Driver'),
+                    ('helper', 'Helper'), ('admin', 'Admin')]
+
+
+def employee_card_filters():
+    """Filter grid karyawan dari query string: status, job_type, client_id, q."""
+    return {
+        'status': (request.args.get('status') or '').strip().lower() or None,
+        'job_type': normalize_job_type(request.args.get('job_type')),
+        'client_id': request.args.get('client_id', type=int),
+        'q': (request.args.get('q') or '').strip() or None,
+    }
+
+
+def employee_card_page(filters, before=None, limit=EMPLOYEE_CARD_PAGE_SIZE):
+    """
+    Satu halaman kartu karyawan (terbaru dulu, keyset id < before).
+    Hanya kolom yang tampil di kartu + nama client (JOIN, bukan lazy load).
+    Mengembalikan (rows, next_cursor).
+    """
+    query = (
+        db.session.query(
+            Employee.id, Employee.name, Employee.position, Employee.job_type,
+            Employee.status, Employee.photo, Client.name.label('client_name'),
+        )
+        .outerjoin(Client, Client.id == Employee.client_id)
+    )
+    if filters['status']:
+        query = query.filter(Employee.status == filters['status'])
+    if filters['job_type']:
+        query = query.filter(Employee.job_type_key == filters['job_type'])
+    if filters['client_id']:
+        query = query.filter(Employee.client_id == filters['client_id'])
+    if filters['q']:
+        term = f"%{filters['q']}%"
+        query = query.filter(or_(Employee.name.ilike(term), Employee.position.ilike(term)))
+    if before:
+        query = query.filter(Employee.id < before)
+
+    rows = query.order_by(Employee.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+@hr_bp.route('/api/employees/cards')
+@login_required
+@role_required('admin', 'hr')
+def api_employee_cards():
+    """
+    JSON halaman berikutnya grid karyawan (infinite scroll):
+    {"items": [...], "html": "<kartu>", "next_cursor": <id> | null}. Parameter: before + filter.
+    """
+    rows, next_cursor = employee_card_page(employee_card_filters(), before=request.args.get('before', type=int))
+    return jsonify({
+        'items': [
+            {
+                'id': row.id,
+                'name': row.name,
+                'position': row.position,
+                'job_type': row.job_type,
+                'status': row.status,
+                'client': row.client_name,
+                'photo': upload_url(row.photo, 'avatar'),
+            }
+            for row in rows
+        ],
+        'html': render_template('hr/employee_card_items.html', employees=rows),
+        'next_cursor': next_cursor,
+    })
+
+
 @hr_bp.route('/employees', methods=['GET', 'POST'])
 @login_required
 @role_required('admin', 'hr')
 def manage_employees():
-    clients = Client.query.all()
-
     if request.method == 'POST':
         name = request.form.get('name')
         position = request.form.get('position')
@@ -61,11 +136,10 @@ def manage_employees():
         db.session.flush()
 
         filename = 'default_user.png'
-        if file and allowed_file(file.filename):
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            ext = file.filename.rsplit('.', 1)[1].lower()
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            file.save(os.path.join(UPLOAD_FOLDER, filename))
+        stored_photo = store_upload(file, ALLOWED_EXTENSIONS)
+        if stored_photo:
+            filename = stored_photo.name
+            generate_variants(filename)
 
         new_employee = Employee(
             name=name,
@@ -79,6 +153,8 @@ def manage_employees():
         )
         db.session.add(new_employee)
         db.session.flush()
+        if stored_photo:
+            link_upload(stored_photo, OWNER_EMPLOYEE_PHOTO, new_employee.id)
 
         if client_id:
             new_assignment = Assignment(
@@ -106,8 +182,18 @@ def manage_employees():
 
         return redirect(url_for('hr.employee_details', id=new_employee.id))
 
-    employees = Employee.query.order_by(Employee.id.desc()).all()
-    return render_template('hr/employee_cards.html', employees=employees, clients=clients)
+    filters = employee_card_filters()
+    employees, next_cursor = employee_card_page(filters)
+    clients = db.session.query(Client.id, Client.name).order_by(Client.name).all()
+    return render_template(
+        'hr/employee_cards.html',
+        employees=employees,
+        next_cursor=next_cursor,
+        filters=filters,
+        clients=clients,
+        statuses=EMPLOYEE_STATUSES,
+        job_types=JOB_TYPE_CHOICES,
+    )
 
 
 # ============================================================
@@ -174,29 +260,24 @@ def edit_employee(id):
         pd.emergency_relation     = request.form.get('emergency_hubungan')
         pd.emergency_address      = request.form.get('emergency_alamat')
 
-        file_photo = request.files.get('photo')
-        if file_photo and allowed_file(file_photo.filename):
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            ext = file_photo.filename.rsplit('.', 1)[1].lower()
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            file_photo.save(os.path.join(UPLOAD_FOLDER, filename))
-            employee.photo = filename
+        stored_photo = store_upload(request.files.get('photo'), ALLOWED_EXTENSIONS)
+        if stored_photo:
+            generate_variants(stored_photo.name)
+            employee.photo = stored_photo.name
+            link_upload(stored_photo, OWNER_EMPLOYEE_PHOTO, employee.id)
 
         doc_fields = {"ktp": "KTP", "ijazah": "Ijazah"}
         for field_name, label in doc_fields.items():
-            file_doc = request.files.get(field_name)
-            if file_doc and allowed_file(file_doc.filename):
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                ext = file_doc.filename.rsplit('.', 1)[1].lower()
-                fname = f"{uuid.uuid4().hex}.{ext}"
-                path = os.path.join(UPLOAD_FOLDER, fname)
-                file_doc.save(path)
+            stored_doc = store_upload(request.files.get(field_name), ALLOWED_EXTENSIONS)
+            if stored_doc:
                 new_doc = EmployeeDocument(
                     employee_id=employee.id,
                     document_type=label,
-                    file_path=f"uploads/{fname}",
+                    file_path=stored_doc.name,
                 )
                 db.session.add(new_doc)
+                db.session.flush()
+                link_upload(stored_doc, OWNER_EMPLOYEE_DOCUMENT, new_doc.id)
 
         db.session.commit()
         flash(f"✅ Data lengkap {employee.name} berhasil diperbarui!", "success")
@@ -256,30 +337,152 @@ def print_employee_pdf(id):
         employee.personal_detail = EmployeePersonalDetail(employee_id=id)
         db.session.add(employee.personal_detail)
 
-    photo_path = None
-    if employee.photo and employee.photo != 'default_user.png':
-        photo_path = os.path.join(current_app.root_path, 'static', 'uploads', employee.photo)
-    
-    html = render_template(
-        'hr/pdf_bank_style.html', 
-        employee=employee, 
-        now=datetime.now(),
-        photo_path=photo_path
-    )
+    photo_path = biodata_photo_path(employee)
+
+    now = datetime.now()
+    filename = f"Biodata_{employee.name.replace(' ', '_')}.pdf"
+
+    # Kunci cache = hash data karyawan + foto + renderer/versi layout + tanggal cetak
+    cache_key = biodata_cache_key(employee, photo_path, biodata_layout_version(PDF_TEMPLATE), now.date())
+    if cache_key in request.if_none_match:
+        return _pdf_response(None, cache_key, filename, status=304)
 
-    result = io.BytesIO()
-    pdf = pisa.pisaDocument(io.BytesIO(html.encode("UTF-8")), result)
+    cache = get_pdf_cache()
+    cached_path = cache.get(employee.id, cache_key)
+    if cached_path:
+        return _pdf_response(cached_path, cache_key, filename)
 
-    if not pdf.err:
-        response = make_response(result.getvalue())
-        filename = f"Biodata_{employee.name.replace(' ', '_')}.pdf"
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'inline; filename={filename}'
-        return response
+    # Renderer sesuai config PDF_RENDERER (xhtml2pdf / reportlab)
+    render, args = biodata_render_task(employee, photo_path, now, PDF_TEMPLATE)
+    try:
+        data = render(*args)
+    except Exception as e:
+        current_app.logger.error(f"⚠️ Gagal render PDF karyawan {employee.id}: {e}")
+        data = None
+
+    if data:
+        cached_path = cache.put(employee.id, cache_key, data)
+        return _pdf_response(cached_path, cache_key, filename)
     
     flash("Gagal membuat PDF.", "danger")
     return redirect(url_for('hr.employee_details', id=id))
 
+
+def _pdf_response(path, etag, filename, status=200):
+    """Response PDF (inline) dengan ETag; klien wajib revalidasi (data pribadi)."""
+    if status == 304:
+        response = make_response('', 304)
+    else:
+        response = send_file(path, mimetype='application/pdf', download_name=filename, etag=False)
+    response.set_etag(etag)
+    response.headers['Content-Disposition'] = f'inline; filename={filename}'
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+# ============================================================
+# 🗂️  CETAK MASSAL PDF BIODATA (ZIP)
+# ============================================================
+# Job berjalan mengikuti stream unduhan (lihat app/hr/pdf_bulk.py)
+BULK_PDF_PENDING_MESSAGE = 'Job diproses saat download_url dibuka; status tetap "pending" sampai unduhan dimulai.'
+
+
+@hr_bp.route('/employees/bulk_pdf', methods=['POST'])
+@login_required
+@role_required('admin', 'hr')
+def bulk_employee_pdf():
+    """
+    Buat job cetak massal dari client_id atau daftar employee_ids.
+    JSON → {job_id, download_url, status_url}; form biasa → langsung unduh.
+    Render baru berjalan saat download_url dibuka; sampai itu status "pending".
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        raw_ids = payload.get('employee_ids') or []
+        if not isinstance(raw_ids, list):
+            raw_ids = [raw_ids]
+    else:
+        payload = request.form
+        raw_ids = payload.getlist('employee_ids')
+    client_id = payload.get('client_id')
+
+    try:
+        # Terima daftar id maupun string "1,2,3"
+        employee_ids = sorted({
+            int(part) for item in raw_ids for part in str(item).split(',') if part.strip()
+        })
+        client_id = int(client_id) if client_id else None
+    except ValueError:
+        return jsonify({'error': 'client_id / employee_ids tidak valid.'}), 400
+
+    if client_id:
+        client = Client.query.get_or_404(client_id)
+        employee_ids = [
+            emp_id for (emp_id,) in
+            db.session.query(Employee.id).filter(Employee.client_id == client_id).order_by(Employee.id)
+        ]
+        label = client.name
+    else:
+        label = f"{len(employee_ids)} karyawan"
+
+    if not employee_ids:
+        return jsonify({'error': 'Tidak ada karyawan yang dipilih.'}), 400
+    if len(employee_ids) > current_app.config['BULK_PDF_MAX_EMPLOYEES']:
+        return jsonify({'error': f"Maksimal {current_app.config['BULK_PDF_MAX_EMPLOYEES']} karyawan per job."}), 400
+
+    job = create_job(employee_ids, label)
+    download_url = url_for('hr.bulk_employee_pdf_download', job_id=job['id'])
+    status_url = url_for('hr.bulk_employee_pdf_status', job_id=job['id'])
+
+    if request.is_json:
+        return jsonify({
+            'job_id': job['id'],
+            'total': job['total'],
+            'download_url': download_url,
+            'status_url': status_url,
+            'state': job['state'],
+            'message': BULK_PDF_PENDING_MESSAGE,
+        }), 202
+    return redirect(download_url)
+
+
+@hr_bp.route('/employees/bulk_pdf/<job_id>/download')
+@login_required
+@role_required('admin', 'hr')
+def bulk_employee_pdf_download(job_id):
+    job = load_job(job_id)
+    if not job:
+        abort(404)
+
+    safe_label = ''.join(ch if ch.isalnum() else '_' for ch in job['label'])
+    response = Response(
+        stream_with_context(iter_bulk_zip(job, PDF_TEMPLATE)),
+        mimetype='application/zip',
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=Biodata_{safe_label}.zip'
+    response.headers['X-Job-Status-URL'] = url_for('hr.bulk_employee_pdf_status', job_id=job_id)
+    return response
+
+
+@hr_bp.route('/employees/bulk_pdf/<job_id>/status')
+@login_required
+@role_required('admin', 'hr')
+def bulk_employee_pdf_status(job_id):
+    job = load_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job tidak ditemukan.'}), 404
+
+    return jsonify({
+        'job_id': job['id'],
+        'label': job['label'],
+        'state': job['state'],
+        'total': job['total'],
+        'done': job['done'],
+        'failed': job['failed'],
+        'percent': round(100 * (job['done'] + job['failed']) / job['total']) if job['total'] else 100,
+        'message': BULK_PDF_PENDING_MESSAGE if job['state'] == 'pending' else None,
+    })
+
 # ============================================================
 # 🔐 RESET PASSWORD KARYAWAN
 # ============================================================
@@ -304,6 +507,7 @@ def reset_password(id):
 
     employee.user.set_password(new_password)
     db.session.commit()
+    forget_user(employee.user_id)
 
     flash(
         f"🔄 Password untuk <b>{employee.name}</b> berhasil di-reset!<br>"
@@ -321,32 +525,87 @@ def reset_password(id):
 # ============================================================
 # 🕒  DASHBOARD ABSENSI UMUM
 # ============================================================
+ATTENDANCE_GRID_PAGE_SIZE = 50
+
+# Filter status di grid → kondisi pada Attendance (LEFT JOIN, tanggal terpilih)
+ATTENDANCE_GRID_FILTERS = {
+    'hadir': lambda: Attendance.status == 'hadir',
+    'izin': lambda: Attendance.status.in_(('izin', 'sakit')),
+    'alfa': lambda: or_(Attendance.id.is_(None), Attendance.status == 'alpha'),
+}
+
+
 @hr_bp.route('/attendance')
 @login_required
 @role_required('admin', 'hr')
 def attendance_dashboard():
-    today = date.today()
-    employees = Employee.query.join(Client).add_entity(Client).filter(Employee.status == 'aktif').all()
-    attendance_today = {
-        a.employee_id: a for a in Attendance.query.filter_by(date=today).all()
-    }
-
-    total_employee = len(employees)
-    hadir = len([a for a in attendance_today.values() if a.status == 'hadir'])
-    sakit = len([a for a in attendance_today.values() if a.status == 'sakit'])
-    izin = len([a for a in attendance_today.values() if a.status == 'izin'])
-    alfa = total_employee - (hadir + sakit + izin)
+    """
+    Monitoring absensi satu tanggal. Parameter: date (YYYY-MM-DD, default hari ini),
+    client_id, q (nama), status (hadir/izin/alfa), after (cursor id) & start (nomor urut).
+    """
+    try:
+        day = datetime.strptime(request.args['date'], "%Y-%m-%d").date() if request.args.get('date') else date.today()
+    except ValueError:
+        day = date.today()
+    client_id = request.args.get('client_id', type=int)
+    search = (request.args.get('q') or '').strip()
+    status_filter = request.args.get('status', '').lower()
+    after = request.args.get('after', type=int)
+    start = max(request.args.get('start', 0, type=int), 0)
+
+    # Angka ringkasan: COUNT + ringkasan harian (tidak memuat baris karyawan)
+    active = db.session.query(func.count(Employee.id)).filter(Employee.status == 'aktif')
+    if client_id:
+        active = active.filter(Employee.client_id == client_id)
+    total_employee = active.scalar()
+
+    counts = attendance_counts(day, client_id)
+    hadir = counts['hadir']
+    sakit = counts['sakit']
+    izin = counts['izin']
+    alfa = max(total_employee - (hadir + sakit + izin), 0)
+
+    # Grid: satu halaman karyawan aktif + status absensi tanggal tsb (keyset id)
+    query = (
+        db.session.query(
+            Employee.id, Employee.name, Employee.position, Employee.photo,
+            Client.name.label('client_name'), Attendance.status.label('attendance_status'),
+        )
+        .outerjoin(Client, Client.id == Employee.client_id)
+        .outerjoin(Attendance, and_(Attendance.employee_id == Employee.id, Attendance.date == day))
+        .filter(Employee.status == 'aktif')
+    )
+    if client_id:
+        query = query.filter(Employee.client_id == client_id)
+    if search:
+        query = query.filter(Employee.name.ilike(f"%{search}%"))
+    if status_filter in ATTENDANCE_GRID_FILTERS:
+        query = query.filter(ATTENDANCE_GRID_FILTERS[status_filter]())
+    if after:
+        query = query.filter(Employee.id > after)
+    rows = query.order_by(Employee.id).limit(ATTENDANCE_GRID_PAGE_SIZE + 1).all()
+
+    next_after = None
+    if len(rows) > ATTENDANCE_GRID_PAGE_SIZE:
+        rows = rows[:ATTENDANCE_GRID_PAGE_SIZE]
+        next_after = rows[-1].id
+
+    clients = db.session.query(Client.id, Client.name).order_by(Client.name).all()
 
     return render_template(
         'hr/attendance_dashboard.html',
-        today=today,
+        today=day,
+        is_today=day == date.today(),
         total_employee=total_employee,
         hadir=hadir,
         sakit=sakit,
         izin=izin,
         alfa=alfa,
-        employees=employees,
-        attendance_today=attendance_today
+        rows=rows,
+        start=start,
+        next_after=next_after,
+        clients=clients,
+        filters={'client_id': client_id, 'q': search, 'status': status_filter},
     )
 
 
@@ -354,6 +613,7 @@ def attendance_dashboard():
 # 🕓  HALAMAN ABSENSI PERSONAL
 # ============================================================
 @hr_bp.route('/attendance/<int:employee_id>', methods=['GET', 'POST'])
+@immediate_transaction
 @login_required
 @role_required('admin', 'hr')
 def employee_attendance_page(employee_id):
@@ -373,22 +633,33 @@ def employee_attendance_page(employee_id):
             if not attendance.check_in:
                 attendance.check_in = current_time
                 attendance.status = 'hadir'
-                flash('✅ Absen masuk berhasil diinput!', 'success')
+                message = ('✅ Absen masuk berhasil diinput!', 'success')
             else:
-                flash('⚠️ Karyawan ini sudah absen masuk sebelumnya.', 'warning')
+                message = ('⚠️ Karyawan ini sudah absen masuk sebelumnya.', 'warning')
                 
         elif action == 'clock_out':
             if not attendance.check_out:
                 attendance.check_out = current_time
-                flash('👋 Absen pulang berhasil diinput!', 'info')
+                message = ('👋 Absen pulang berhasil diinput!', 'info')
             else:
-                flash('⚠️ Karyawan ini sudah absen pulang sebelumnya.', 'warning')
-
-        db.session.commit()
+                message = ('⚠️ Karyawan ini sudah absen pulang sebelumnya.', 'warning')
+        else:
+            message = None
+
+        try:
+            # Ringkasan harian ikut diperbarui saat flush (app/stats.py)
+            db.session.commit()
+        except IntegrityError:
+            # Absensi hari ini baru saja dibuat oleh request lain
+            db.session.rollback()
+            message = ('⚠️ Absensi karyawan ini sedang diproses, silakan cek kembali.', 'warning')
+
+        if message:
+            flash(*message)
         return redirect(url_for('hr.employee_attendance_page', employee_id=employee_id))
 
     activity_logs = ActivityLog.query.filter_by(employee_id=employee_id).filter(
-        db.func.date(ActivityLog.created_at) == today
+        on_day(ActivityLog.created_at, today)
     ).all()
 
     return render_template(
@@ -413,7 +684,7 @@ def operation_dashboard():
         a.employee_id: a for a in Attendance.query.filter_by(date=today).all()
     }
     activities_today = ActivityLog.query.filter(
-        db.func.date(ActivityLog.created_at) == today
+        on_day(ActivityLog.created_at, today)
     ).order_by(ActivityLog.employee_id).all()
 
     logs_grouped = {}
@@ -436,41 +707,48 @@ def operation_dashboard():
 @login_required
 @role_required('admin', 'hr')
 def export_monthly_report():
+    """
+    Export absensi sebagai CSV yang di-stream per batch.
+    Parameter (opsional): month & year (default bulan ini),
+    atau start_date & end_date (YYYY-MM-DD), serta client_id.
+    format=xlsx → file Excel (juga di-stream), default CSV.
+    """
     now = datetime.now()
-    current_month = now.month
-    current_year = now.year
 
-    attendances = Attendance.query.filter(
-        extract('month', Attendance.date) == current_month,
-        extract('year', Attendance.date) == current_year
-    ).order_by(Attendance.date.desc()).all()
+    try:
+        if request.args.get('start_date') or request.args.get('end_date'):
+            start = datetime.strptime(request.args.get('start_date') or request.args['end_date'], "%Y-%m-%d").date()
+            end = datetime.strptime(request.args.get('end_date') or request.args['start_date'], "%Y-%m-%d").date()
+            period = f"{start.strftime('%d-%m-%Y')}_sd_{end.strftime('%d-%m-%Y')}"
+        else:
+            month = request.args.get('month', now.month, type=int)
+            year = request.args.get('year', now.year, type=int)
+            start = date(year, month, 1)
+            end = date(year, month, calendar.monthrange(year, month)[1])
+            period = start.strftime('%B_%Y')
+    except ValueError:
+        flash("Parameter periode laporan tidak valid.", "warning")
+        return redirect(url_for('hr.hr_dashboard'))
 
-    si = io.StringIO()
-    cw = csv.writer(si)
-    
-    cw.writerow(['Tanggal', 'Nama Karyawan', 'Posisi', 'Client', 'Jam Masuk', 'Jam Pulang', 'Status'])
-
-    for att in attendances:
-        emp_name = att.employee.name if att.employee else "Deleted User"
-        emp_pos = att.employee.position if att.employee else "-"
-        client = att.employee.client.name if (att.employee and att.employee.client) else "-"
-        cin = att.check_in.strftime('%H:%M') if att.check_in else "-"
-        cout = att.check_out.strftime('%H:%M') if att.check_out else "-"
-        
-        cw.writerow([
-            att.date.strftime('%d-%m-%Y'),
-            emp_name,
-            emp_pos,
-            client,
-            cin,
-            cout,
-            att.status.upper()
-        ])
-
-    output = make_response(si.getvalue())
-    filename = f"Laporan_Absensi_{now.strftime('%B_%Y')}.csv"
+    if start > end:
+        start, end = end, start
+
+    client_id = request.args.get('client_id', type=int)
+
+    rows = attendance_export_rows(start, end, client_id=client_id)
+    if request.args.get('format') == 'xlsx':
+        output = Response(
+            stream_with_context(iter_xlsx(rows, header=ATTENDANCE_EXPORT_HEADER, sheet_name='Absensi')),
+            mimetype=XLSX_MIMETYPE,
+        )
+        filename = f"Laporan_Absensi_{period}.xlsx"
+    else:
+        output = Response(
+            stream_with_context(iter_csv(rows, header=ATTENDANCE_EXPORT_HEADER)),
+            mimetype="text/csv",
+        )
+        filename = f"Laporan_Absensi_{period}.csv"
     output.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    output.headers["Content-type"] = "text/csv"
     return output
 
 
@@ -483,6 +761,7 @@ def export_monthly_report():
 def delete_employee(id):
     emp = Employee.query.get_or_404(id)
     name = emp.name
+    user_id = emp.user_id
     
     try:
         if emp.user:
@@ -491,6 +770,8 @@ def delete_employee(id):
         db.session.delete(emp)
         
         db.session.commit()
+        if user_id:
+            forget_user(user_id)
         flash(f"🗑️ Data personil {name} beserta seluruh riwayatnya berhasil dihapus permanen.", "info")
     except Exception as e:
         db.session.rollback()
@@ -502,53 +783,165 @@ def delete_employee(id):
 # ============================================================
 # 👤 DETAIL OPERASIONAL
 # ============================================================
+# Tanpa filter tanggal hanya 30 hari terakhir yang dimuat; riwayat lebih
+# lama / halaman berikutnya diambil lewat operation_history (JSON).
+OPERATION_HISTORY_DAYS = 30
+OPERATION_PAGE_SIZE = 50
+
+
+def operation_history_range():
+    """
+    (start_date, end_date) dari query string. Keduanya kosong → 30 hari
+    terakhir. Format salah → ValueError.
+    """
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if not start_date and not end_date:
+        end_date = date.today()
+        return end_date - timedelta(days=OPERATION_HISTORY_DAYS - 1), end_date
+    start_date = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    end_date = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    return start_date, end_date
+
+
+def attendance_history_page(employee_id, start_date, end_date, before=None, limit=OPERATION_PAGE_SIZE):
+    """
+    Absensi satu karyawan (terbaru dulu). Cursor = tanggal terakhir
+    (unik per karyawan, index uq_attendance_employee_date).
+    Mengembalikan (rows, next_cursor 'YYYY-MM-DD' | None).
+    """
+    query = Attendance.query.filter(Attendance.employee_id == employee_id)
+    if start_date:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date:
+        query = query.filter(Attendance.date <= end_date)
+    if before:
+        query = query.filter(Attendance.date < before)
+
+    rows = query.order_by(Attendance.date.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].date.isoformat()
+    return rows, None
+
+
+def _log_cursor(log):
+    return f"{log.created_at.isoformat()}_{log.id}"
+
+
+def _parse_log_cursor(value):
+    """'<created_at ISO>_<id>' → (datetime, id). Salah format → ValueError."""
+    created_at, log_id = value.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(log_id)
+
+
+def activity_log_page(employee_id, start_date, end_date, before=None, limit=OPERATION_PAGE_SIZE):
+    """
+    Log aktivitas satu karyawan (terbaru dulu), keyset (created_at, id)
+    di atas index ix_activity_log_employee_created.
+    Mengembalikan (rows, next_cursor | None).
+    """
+    query = ActivityLog.query.filter(
+        ActivityLog.employee_id == employee_id,
+        *within_days(ActivityLog.created_at, start_date, end_date),
+    )
+    if before:
+        created_at, log_id = before
+        query = query.filter(or_(
+            ActivityLog.created_at < created_at,
+            and_(ActivityLog.created_at == created_at, ActivityLog.id < log_id),
+        ))
+
+    rows = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, _log_cursor(rows[-1])
+    return rows, None
+
+
 @hr_bp.route('/operation/<int:employee_id>', methods=['GET'])
 @login_required
 @role_required('admin', 'hr')
 def operation_detail(employee_id):
     employee = Employee.query.get_or_404(employee_id)
 
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
     try:
-        if start_date:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        if end_date:
-            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        start_date, end_date = operation_history_range()
     except ValueError:
         flash("Format tanggal tidak valid.", "warning")
         return redirect(url_for('hr.operation_dashboard'))
 
-    query = Attendance.query.filter_by(employee_id=employee_id).order_by(Attendance.date.desc())
-    if start_date and end_date:
-        query = query.filter(Attendance.date.between(start_date, end_date))
-    elif start_date:
-        query = query.filter(Attendance.date >= start_date)
-    elif end_date:
-        query = query.filter(Attendance.date <= end_date)
-    attendance_history = query.all()
-
-    logs_query = ActivityLog.query.filter_by(employee_id=employee_id)
-    if start_date and end_date:
-        logs_query = logs_query.filter(db.func.date(ActivityLog.created_at).between(start_date, end_date))
-    elif start_date:
-        logs_query = logs_query.filter(db.func.date(ActivityLog.created_at) >= start_date)
-    elif end_date:
-        logs_query = logs_query.filter(db.func.date(ActivityLog.created_at) <= end_date)
-    work_logs = logs_query.order_by(ActivityLog.created_at.desc()).all()
+    attendance_history, attendance_cursor = attendance_history_page(employee_id, start_date, end_date)
+    work_logs, logs_cursor = activity_log_page(employee_id, start_date, end_date)
 
     return render_template(
         'hr/operation_detail.html',
         employee=employee,
         attendance_history=attendance_history,
+        attendance_cursor=attendance_cursor,
         work_logs=work_logs,
+        logs_cursor=logs_cursor,
         start_date=start_date,
         end_date=end_date,
         today=date.today() 
     )
 
 
+@hr_bp.route('/operation/<int:employee_id>/history', methods=['GET'])
+@login_required
+@role_required('admin', 'hr')
+def operation_history(employee_id):
+    """
+    JSON halaman berikutnya untuk detail operasional:
+    ?section=attendance|logs&before=<cursor>&start_date=..&end_date=..
+    → {"items": [...], "html": "<baris>", "next_cursor": ... | null}.
+    """
+    section = request.args.get('section')
+    if section not in ('attendance', 'logs'):
+        abort(400)
+    if not db.session.query(Employee.id).filter_by(id=employee_id).scalar():
+        abort(404)
+
+    before = request.args.get('before')
+    try:
+        start_date, end_date = operation_history_range()
+        if section == 'attendance':
+            before = datetime.strptime(before, "%Y-%m-%d").date() if before else None
+        else:
+            before = _parse_log_cursor(before) if before else None
+    except ValueError:
+        return jsonify({'error': 'Format tanggal / cursor tidak valid.'}), 400
+
+    if section == 'attendance':
+        rows, next_cursor = attendance_history_page(employee_id, start_date, end_date, before=before)
+        items = [
+            {
+                'date': a.date.isoformat(),
+                'check_in': a.check_in.strftime('%H:%M') if a.check_in else None,
+                'check_out': a.check_out.strftime('%H:%M') if a.check_out else None,
+                'status': a.status,
+            }
+            for a in rows
+        ]
+        html = render_template('hr/operation_attendance_rows.html', attendance_history=rows)
+    else:
+        rows, next_cursor = activity_log_page(employee_id, start_date, end_date, before=before)
+        items = [
+            {
+                'id': log.id,
+                'created_at': log.created_at.isoformat(),
+                'description': log.description,
+                'latitude': log.latitude,
+                'longitude': log.longitude,
+                'image': upload_url(log.image, 'card', default=None),
+            }
+            for log in rows
+        ]
+        html = render_template('hr/operation_log_items.html', work_logs=rows)
+
+    return jsonify({'items': items, 'html': html, 'next_cursor': next_cursor})
+
+
 # ============================================================
 # 🧾  KELOLA CLIENT
 # ============================================================
@@ -603,33 +996,73 @@ def delete_client(id):
 
     db.session.delete(client)
     db.session.commit()
+    if client.user_id:
+        forget_user(client.user_id)
     flash(f"🗑️ Mitra {client.name} berhasil dihapus.", "info")
     return redirect(url_for('hr.manage_clients'))
 
 # ============================================================
 # 🔗 API: GET KARYAWAN BY JOB TYPE (Untuk Chart Click)
 # ============================================================
+# Modal chart bisa berisi ribuan karyawan → dikirim per halaman (cursor = id terakhir)
+BY_JOB_PAGE_SIZE = 50
+BY_JOB_MAX_PAGE_SIZE = 200
+
+# Respons disimpan sebentar; versi "employees" naik setiap commit Employee / Client
+_by_job_cache = TTLCache(ttl=30, max_entries=256)
+watch_models('employees', Employee, Client)
+
+
 @hr_bp.route('/api/employees/by_job/<path:job_type>')
 @login_required
 def get_employees_by_job(job_type):
-    """Mengembalikan JSON data karyawan berdasarkan job_type untuk Modal Dashboard"""
-    
-    employees = Employee.query.filter(
-        func.lower(Employee.job_type) == job_type.lower(),
-        Employee.status == 'aktif'
-    ).all()
-    
-    data = []
-    for emp in employees:
-        data.append({
-            'name': emp.name,
-            'position': emp.position,
-            'client': emp.client.name if emp.client else '-',
-            'join_date': emp.join_date.strftime('%d-%m-%Y') if emp.join_date else '-',
-            'photo': url_for('static', filename='uploads/' + emp.photo) if emp.photo else url_for('static', filename='uploads/default_user.png')
-        })
-        
-    return jsonify(data)
+    """
+    JSON karyawan aktif per job_type untuk Modal Dashboard:
+    {"items": [...], "next_cursor": <id> | null}. Halaman berikutnya: ?cursor=<next_cursor>.
+    """
+    key = normalize_job_type(job_type)
+    cursor = request.args.get('cursor', type=int)
+    limit = request.args.get('limit', BY_JOB_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, BY_JOB_MAX_PAGE_SIZE))
+
+    cache_key = (data_version('employees'), key, cursor, limit)
+    payload = _by_job_cache.get(cache_key)
+    if payload is None:
+        query = (
+            db.session.query(
+                Employee.id, Employee.name, Employee.position, Employee.join_date,
+                Employee.photo, Client.name.label('client_name'),
+            )
+            .outerjoin(Client, Client.id == Employee.client_id)
+            .filter(Employee.status == 'aktif')
+        )
+        if key is None or key == 'lainnya':
+            # Slice "Lainnya" di chart = job_type kosong
+            query = query.filter(or_(Employee.job_type_key == 'lainnya', Employee.job_type_key.is_(None)))
+        else:
+            query = query.filter(Employee.job_type_key == key)
+        if cursor:
+            query = query.filter(Employee.id > cursor)
+        rows = query.order_by(Employee.id).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        payload = {
+            'items': [
+                {
+                    'name': row.name,
+                    'position': row.position,
+                    'client': row.client_name or '-',
+                    'join_date': row.join_date.strftime('%d-%m-%Y') if row.join_date else '-',
+                    'photo': upload_url(row.photo, 'avatar'),
+                }
+                for row in rows
+            ],
+            'next_cursor': rows[-1].id if has_more else None,
+        }
+        _by_job_cache.set(cache_key, payload)
+
+    return jsonify(payload)
 
 # ============================================================
 # 📊  DASHBOARD HR UTAMA
@@ -645,13 +1078,13 @@ def hr_dashboard():
     total_clients = Client.query.count()
     total_assignments = Assignment.query.filter_by(status='aktif').count()
     
-    hadir_hari_ini = Attendance.query.filter_by(date=today, status='hadir').count()
+    hadir_hari_ini = attendance_counts(today)['hadir']
 
     job_labels = []
     job_counts = []
     job_data = (
-        db.session.query(Employee.job_type, db.func.count(Employee.id))
-        .group_by(Employee.job_type)
+        db.session.query(Employee.job_type_key, db.func.count(Employee.id))
+        .group_by(Employee.job_type_key)
         .all()
     )
     for label, count in job_data:
@@ -683,4 +1116,40 @@ def hr_dashboard():
         client_labels=client_labels,
         client_counts=client_counts,
         today=today
-    )
\ No newline at end of file
+    )
+
+# ============================================================
+# 📈 API: RINGKASAN ABSENSI HARIAN (Untuk Grafik Riwayat)
+# ============================================================
+@hr_bp.route('/api/attendance/daily_stats')
+@login_required
+@role_required('admin', 'hr')
+def api_daily_attendance_stats():
+    """
+    Mengembalikan JSON jumlah hadir/izin/sakit/alpha per tanggal.
+    Parameter: start, end (YYYY-MM-DD, default 30 hari terakhir), client_id.
+    """
+    try:
+        end = datetime.strptime(request.args['end'], "%Y-%m-%d").date() if request.args.get('end') else date.today()
+        start = datetime.strptime(request.args['start'], "%Y-%m-%d").date() if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Format tanggal tidak valid (YYYY-MM-DD).'}), 400
+
+    if start > end:
+        return jsonify({'error': 'Tanggal awal melebihi tanggal akhir.'}), 400
+    if (end - start).days > 366:
+        return jsonify({'error': 'Rentang maksimal 1 tahun.'}), 400
+
+    client_id = request.args.get('client_id', type=int)
+    days = daily_attendance_range(start, end, client_id)
+
+    return jsonify([
+        {
+            'date': d.date.isoformat(),
+            'hadir': d.hadir,
+            'izin': d.izin,
+            'sakit': d.sakit,
+            'alpha': d.alpha,
+        }
+        for d in days
+    ])
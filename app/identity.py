@@ -0,0 +1,98 @@
+# ==============================================================
+#  app/identity.py – Cache identitas user untuk Flask-Login
+# ==============================================================
+#  user_loader dipanggil di SETIAP request yang login (termasuk
+#  polling JSON). Daripada SELECT users tiap kali, worker menyimpan
+#  snapshot ringan (UserIdentity) di TTLCache selama ≤ 60 detik.
+#
+#  Entri cache per id user, dicocokkan dengan dua versi:
+#  - ID sesi berbentuk '<id>:<versi kredensial>' (User.get_id), versi
+#    diturunkan dari password_hash → reset password membuat sesi lama
+#    tidak cocok lagi dan otomatis logout.
+#  - Setiap commit yang mengubah/menghapus User menaikkan versi
+#    "users" (watch_models) → semua worker langsung memuat ulang.
+#  - forget_user() menghapus entri lokal secara eksplisit; TTL menjadi
+#    batas atas jika file versi gagal ditulis.
+# ==============================================================
+
+from flask_login import UserMixin
+
+from app.cache import TTLCache, data_version, watch_models
+from app.models import User, credentials_version
+
+IDENTITY_CACHE_TTL = 60
+IDENTITY_CACHE_SIZE = 1024
+
+_identity_cache = TTLCache(ttl=IDENTITY_CACHE_TTL, max_entries=IDENTITY_CACHE_SIZE)
+watch_models('users', User)
+
+
+class UserIdentity(UserMixin):
+    """Snapshot user yang login (bukan objek ORM → aman dipakai lintas request)."""
+
+    def __init__(self, id, username, role, active, credentials):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.active = active
+        self.credentials = credentials
+
+    @property
+    def is_active(self):
+        return bool(self.active)
+
+    def get_id(self):
+        return f"{self.id}:{self.credentials}"
+
+    def __repr__(self):
+        return f"<UserIdentity {self.username} ({self.role})>"
+
+
+def _parse_session_id(value):
+    """'<id>:<versi>' → (id, versi). ID lama tanpa versi → (id, None)."""
+    user_id, _, credentials = str(value).partition(":")
+    return int(user_id), credentials or None
+
+
+def _fetch_identity(user_id):
+    row = (
+        User.query.with_entities(User.id, User.username, User.role, User.active, User.password_hash)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return UserIdentity(
+        row.id, row.username, row.role, row.active, credentials_version(row.password_hash)
+    )
+
+
+def load_identity(session_id):
+    """
+    UserIdentity untuk ID sesi Flask-Login, atau None jika user sudah
+    dihapus, nonaktif, atau password-nya diganti sejak login.
+    """
+    try:
+        user_id, credentials = _parse_session_id(session_id)
+    except ValueError:
+        return None
+
+    version = data_version('users')
+    cached = _identity_cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        identity = cached[1]
+    else:
+        # False = user tidak ada (disimpan juga agar cookie basi tidak SELECT terus)
+        identity = _fetch_identity(user_id) or False
+        _identity_cache.set(user_id, (version, identity))
+
+    if not identity or not identity.is_active:
+        return None
+    if credentials is not None and credentials != identity.credentials:
+        return None
+    return identity
+
+
+def forget_user(user_id):
+    """Buang snapshot user di worker ini (dipanggil setelah akun diubah/dihapus)."""
+    _identity_cache.pop(user_id)
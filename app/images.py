@@ -0,0 +1,261 @@
+# ==============================================================
+#  app/images.py – Varian gambar upload (avatar / card / full)
+# ==============================================================
+#  Foto asli dari HP (WhatsApp, kamera) bisa beberapa MB. Setiap
+#  kali file gambar di-upload, dibuat varian berukuran tetap di
+#  UPLOAD_FOLDER/variants/<varian>/ (WebP, fallback JPEG), dan
+#  template / API memakai varian kecil lewat upload_url().
+#  Sebelum disimpan, gambar upload melewati ingest_image():
+#  sisi terpanjang dibatasi, orientasi EXIF diterapkan, metadata
+#  dibuang dan dikompres ulang. URL menuju route main.upload_file
+#  (cache immutable, lihat app/storage.py).
+#
+#  Pillow baru di-import saat gambar benar-benar diproses, agar
+#  worker yang hanya melayani halaman tidak memuatnya saat boot.
+# ==============================================================
+
+import io
+import logging
+import os
+from typing import NamedTuple
+
+from flask import current_app, url_for
+
+logger = logging.getLogger(__name__)
+
+# Subfolder varian di dalam UPLOAD_FOLDER
+VARIANTS_DIR = "variants"
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
+
+DEFAULT_PHOTO = "default_user.png"
+
+_webp_supported = None
+
+
+class ImageVariant(NamedTuple):
+    """Ukuran maksimum varian; crop=True → dipotong persegi pas ukuran."""
+    width: int
+    height: int
+    crop: bool = False
+    quality: int = 80
+
+
+# Urut dari terbesar → terkecil (varian kecil dibuat dari hasil varian sebelumnya)
+IMAGE_VARIANTS = {
+    "full": ImageVariant(1600, 1600),            # lightbox / tampilan penuh
+    "card": ImageVariant(480, 480),              # preview aktivitas, kartu
+    "avatar": ImageVariant(160, 160, crop=True), # foto profil bulat (tampil ≤ 80px)
+}
+
+
+# ------------------------------------------------------------
+# 📂 Nama & path file upload
+# ------------------------------------------------------------
+def upload_name(value):
+    """
+    Nama file relatif terhadap UPLOAD_FOLDER dari nilai kolom database.
+    Kolom lama menyimpan 'x.jpg', 'uploads/x.jpg' atau 'static/uploads/x.jpg'.
+    """
+    if not value:
+        return None
+    value = value.replace("\\", "/").lstrip("/")
+    for prefix in ("app/static/uploads/", "static/uploads/", "uploads/"):
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    return value
+
+
+def is_image(name):
+    return bool(name) and "." in name and name.rsplit(".", 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_format():
+    """Format file varian: WebP jika Pillow mendukung, selain itu JPEG."""
+    global _webp_supported
+    wanted = current_app.config.get("IMAGE_VARIANT_FORMAT", "webp")
+    if wanted == "webp":
+        if _webp_supported is None:
+            from PIL import features
+            _webp_supported = bool(features.check("webp"))
+        if not _webp_supported:
+            return "jpeg"
+    return wanted
+
+
+def variant_name(name, variant, fmt=None):
+    """'foto/x.jpg' + 'avatar' → 'variants/avatar/foto/x.webp'."""
+    fmt = fmt or variant_format()
+    stem = name.rsplit(".", 1)[0]
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return f"{VARIANTS_DIR}/{variant}/{stem}.{ext}"
+
+
+def upload_path(value):
+    """Path absolut file upload dari nilai kolom / nama file."""
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], *upload_name(value).split("/"))
+
+
+# ------------------------------------------------------------
+# 📥 Ingest upload gambar (dipakai store_stream untuk semua route)
+# ------------------------------------------------------------
+class IngestedImage(NamedTuple):
+    data: bytes
+    ext: str
+
+
+def ingest_image(raw, ext):
+    """
+    Byte gambar upload → IngestedImage siap simpan: tegak sesuai EXIF,
+    sisi terpanjang ≤ UPLOAD_IMAGE_MAX_EDGE, tanpa EXIF/GPS, dikompres
+    ulang (JPEG; PNG jika transparan). GIF (bisa animasi) dilewati → None.
+    Byte asli dipakai jika hasilnya tidak lebih kecil dan memang tidak
+    ada yang perlu diubah. Gagal decode → UnidentifiedImageError / OSError.
+    """
+    if ext == "gif":
+        return None
+    from PIL import Image, ImageOps
+
+    max_edge = current_app.config["UPLOAD_IMAGE_MAX_EDGE"]
+    quality = current_app.config["UPLOAD_IMAGE_QUALITY"]
+
+    with Image.open(io.BytesIO(raw)) as img:
+        exif = img.getexif()
+        needs_change = bool(exif) or max(img.size) > max_edge
+        icc_profile = img.info.get("icc_profile")
+        img.draft("RGB", (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        img = img.convert("RGBA" if has_alpha else "RGB")
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+
+    out = io.BytesIO()
+    if has_alpha:
+        img.save(out, format="PNG", optimize=True, icc_profile=icc_profile)
+        out_ext = "png"
+    else:
+        img.save(out, format="JPEG", quality=quality, optimize=True, progressive=True,
+                 icc_profile=icc_profile)
+        out_ext = "jpg"
+
+    data = out.getvalue()
+    if not needs_change and len(data) >= len(raw):
+        return IngestedImage(raw, ext)
+    return IngestedImage(data, out_ext)
+
+
+# ------------------------------------------------------------
+# 🖼️ Pembuatan varian (Pillow)
+# ------------------------------------------------------------
+def _prepare(img, fmt):
+    """Mode warna yang cocok dengan format tujuan (JPEG tidak punya alpha)."""
+    from PIL import Image
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha and fmt == "webp":
+        return img.convert("RGBA")
+    if has_alpha:
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _resize(img, spec):
+    from PIL import Image, ImageOps
+
+    if spec.crop:
+        return ImageOps.fit(img, (spec.width, spec.height), Image.LANCZOS)
+    out = img.copy()
+    out.thumbnail((spec.width, spec.height), Image.LANCZOS, reducing_gap=3.0)
+    return out
+
+
+def _save_atomic(img, path, fmt, quality):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    options = {"quality": quality}
+    if fmt == "jpeg":
+        options.update(optimize=True, progressive=True)
+    else:
+        options.update(method=4)
+    img.save(tmp_path, format=fmt.upper(), **options)
+    os.replace(tmp_path, path)
+
+
+def generate_variants(value, force=False):
+    """
+    Buat seluruh varian untuk satu file upload (nilai kolom atau nama file).
+    Varian yang sudah ada & lebih baru dari file asli dilewati kecuali force.
+    Mengembalikan jumlah varian yang ditulis; gagal → 0 (upload tetap jalan).
+    """
+    name = upload_name(value)
+    if not is_image(name) or name.startswith(f"{VARIANTS_DIR}/"):
+        return 0
+
+    from PIL import Image, ImageOps
+
+    src = upload_path(name)
+    fmt = variant_format()
+    try:
+        src_mtime = os.stat(src).st_mtime
+        targets = {}
+        for variant in IMAGE_VARIANTS:
+            path = upload_path(variant_name(name, variant, fmt))
+            if force or not os.path.exists(path) or os.path.getmtime(path) < src_mtime:
+                targets[variant] = path
+        if not targets:
+            return 0
+
+        largest = max(IMAGE_VARIANTS.values(), key=lambda s: s.width * s.height)
+        with Image.open(src) as img:
+            # JPEG: decode langsung di skala kecil (jauh lebih cepat untuk foto HP)
+            img.draft("RGB", (largest.width, largest.height))
+            base = _prepare(ImageOps.exif_transpose(img), fmt)
+
+        written = 0
+        for variant, spec in IMAGE_VARIANTS.items():
+            out = _resize(base, spec)
+            if variant in targets:
+                _save_atomic(out, targets[variant], fmt, spec.quality)
+                written += 1
+            if not spec.crop:
+                base = out  # varian berikutnya (lebih kecil) dibuat dari hasil ini
+        return written
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal membuat varian gambar {name}: {e}")
+        return 0
+
+
+def iter_upload_images():
+    """Semua file gambar asli di UPLOAD_FOLDER (tanpa folder varian)."""
+    root = current_app.config["UPLOAD_FOLDER"]
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if rel != VARIANTS_DIR:
+                        stack.append(rel)
+                elif is_image(entry.name):
+                    yield rel
+
+
+# ------------------------------------------------------------
+# 🔗 URL untuk template & API
+# ------------------------------------------------------------
+def upload_url(value, variant=None, default=DEFAULT_PHOTO):
+    """
+    URL file upload; jika `variant` diminta dan sudah dibuat, URL varian.
+    Dipakai di template: {{ upload_url(emp.photo, 'avatar') }}.
+    """
+    name = upload_name(value) or default
+    if not name:
+        return None
+    if variant and is_image(name):
+        candidate = variant_name(name, variant)
+        if os.path.isfile(upload_path(candidate)):
+            name = candidate
+    return url_for("main.upload_file", name=name)
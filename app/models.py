@@ -1,19 +1,33 @@
 from app import db
+import hashlib
 from datetime import datetime, date
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
 # ============================================================
 # 1️⃣ HR DEVELOPMENT — Data Karyawan
 # ============================================================
+def normalize_job_type(value):
+    """Kunci pencarian job_type (mis. ' Security ' → 'security'); kosong → None."""
+    if value is None:
+        return None
+    return value.strip().lower() or None
+
+
 class Employee(db.Model):
     __tablename__ = "employees"
+    __table_args__ = (
+        # Daftar karyawan aktif per jenis pekerjaan (chart dashboard HR), urut id
+        db.Index("ix_employees_job_type_key_status", "job_type_key", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     position = db.Column(db.String(100))
     job_type = db.Column(db.String(50))
+    job_type_key = db.Column(db.String(50))  # normalize_job_type(job_type), diisi otomatis
     join_date = db.Column(db.Date, default=date.today)
     end_date = db.Column(db.Date, nullable=True)
     status = db.Column(db.String(20), default="aktif")
@@ -32,6 +46,11 @@ class Employee(db.Model):
     documents = db.relationship("EmployeeDocument", backref="employee", lazy=True, cascade="all, delete-orphan")
     activity_log = db.relationship("ActivityLog", backref="employee", lazy=True, cascade="all, delete-orphan")
 
+    @validates("job_type")
+    def _set_job_type_key(self, key, value):
+        self.job_type_key = normalize_job_type(value)
+        return value
+
     def __repr__(self):
         return f"<Employee {self.name} ({self.job_type})>"
 
@@ -80,8 +99,27 @@ class Contract(db.Model):
 # ============================================================
 # 4️⃣ ATTENDANCE — Kehadiran
 # ============================================================
+# Nilai kanonik kolom Attendance.status (huruf kecil, tanpa spasi)
+ATTENDANCE_STATUSES = ("hadir", "izin", "sakit", "alpha")
+ATTENDANCE_STATUS_ALIASES = {"alfa": "alpha"}
+
+
+def normalize_attendance_status(value):
+    """Ubah status absensi ke bentuk kanonik (mis. ' Hadir' → 'hadir')."""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    return ATTENDANCE_STATUS_ALIASES.get(value, value) or None
+
+
 class Attendance(db.Model):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # Hitungan status per hari cukup dibaca dari index (tanpa scan tabel)
+        db.Index("ix_attendance_date_status", "date", "status"),
+        # Satu baris absensi per karyawan per hari (juga index lookup "hari ini")
+        db.Index("uq_attendance_employee_date", "employee_id", "date", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employees.id"), nullable=False)
@@ -91,6 +129,11 @@ class Attendance(db.Model):
     check_out = db.Column(db.Time)
     overtime_hours = db.Column(db.Float, default=0.0)
 
+    @validates("status")
+    def _normalize_status(self, key, value):
+        # Semua jalur tulis menyimpan status dalam bentuk kanonik
+        return normalize_attendance_status(value)
+
     def __repr__(self):
         return f"<Attendance Emp={self.employee_id} {self.date} {self.status}>"
 
@@ -100,6 +143,10 @@ class Attendance(db.Model):
 # ============================================================
 class Assignment(db.Model):
     __tablename__ = "assignments"
+    __table_args__ = (
+        # Penugasan aktif per client (dashboard client)
+        db.Index("ix_assignments_client_status", "client_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employees.id"), nullable=False)
@@ -117,6 +164,11 @@ class Assignment(db.Model):
 # ============================================================
 # 6️⃣ USER — Akun login
 # ============================================================
+def credentials_version(password_hash):
+    """Sidik pendek password_hash; berubah setiap password diganti."""
+    return hashlib.sha256((password_hash or "").encode()).hexdigest()[:12]
+
+
 class User(UserMixin, db.Model):
     __tablename__ = "users"
 
@@ -135,6 +187,10 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def get_id(self):
+        """ID sesi Flask-Login: '<id>:<versi kredensial>' (lihat app/identity.py)."""
+        return f"{self.id}:{credentials_version(self.password_hash)}"
+
     def __repr__(self):
         return f"<User {self.username} ({self.role})>"
 
@@ -144,6 +200,10 @@ class User(UserMixin, db.Model):
 # ============================================================
 class ActivityLog(db.Model):
     __tablename__ = "activity_log"
+    __table_args__ = (
+        db.Index("ix_activity_log_employee_created", "employee_id", "created_at"),
+        db.Index("ix_activity_log_created_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employees.id"), nullable=False)
@@ -151,6 +211,10 @@ class ActivityLog(db.Model):
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
     image = db.Column(db.String(255))
+    # Foto diproses di background (app/activity_photos.py):
+    # image_status = pending / ready / failed, image_raw = file mentah di inbox
+    image_status = db.Column(db.String(20))
+    image_raw = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -228,4 +292,81 @@ class EmployeeDocument(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f"<EmployeeDocument Emp={self.employee_id} {self.document_type}>"
\ No newline at end of file
+        return f"<EmployeeDocument Emp={self.employee_id} {self.document_type}>"
+
+# ============================================================
+# 🔟 ATTENDANCE DAILY STATS — Ringkasan absensi per hari/client
+# ============================================================
+class AttendanceDailyStat(db.Model):
+    """
+    Ringkasan jumlah hadir/izin/sakit/alpha per tanggal & client.
+    Diperbarui bersamaan dengan penulisan Attendance (lihat app/stats.py),
+    sehingga dashboard & grafik tidak perlu memindai tabel attendance.
+    client_id NULL = karyawan tanpa client.
+    """
+    __tablename__ = "attendance_daily_stats"
+    __table_args__ = (
+        # Satu baris per (tanggal, client); COALESCE agar client NULL juga unik
+        db.Index("uq_attendance_daily_stats_date_client", "date",
+                 db.text("coalesce(client_id, 0)"), unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id", ondelete="SET NULL"), nullable=True)
+    hadir = db.Column(db.Integer, nullable=False, default=0)
+    izin = db.Column(db.Integer, nullable=False, default=0)
+    sakit = db.Column(db.Integer, nullable=False, default=0)
+    alpha = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AttendanceDailyStat {self.date} Client={self.client_id}>"
+
+
+# ============================================================
+# 1️⃣1️⃣ UPLOAD BLOB — File upload berbasis isi (SHA-256)
+# ============================================================
+class UploadBlob(db.Model):
+    """
+    Satu file fisik di UPLOAD_FOLDER. Nama file = sha256 isi + ekstensi,
+    sehingga upload dengan isi yang sama memakai file yang sama (lihat app/storage.py).
+    File lama (sebelum penyimpanan berbasis isi) tetap memakai nama aslinya.
+    """
+    __tablename__ = "upload_blobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    name = db.Column(db.String(255), nullable=False, unique=True)  # relatif terhadap UPLOAD_FOLDER
+    size = db.Column(db.Integer)           # byte yang tersimpan
+    original_size = db.Column(db.Integer)  # byte upload asli sebelum ingest (NULL = file lama)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    references = db.relationship("UploadReference", backref="blob", lazy=True, cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<UploadBlob {self.name}>"
+
+
+# ============================================================
+# 1️⃣2️⃣ UPLOAD REFERENCE — Kolom mana memakai blob mana
+# ============================================================
+class UploadReference(db.Model):
+    """
+    Pemetaan kolom file (Employee.photo, ActivityLog.image,
+    EmployeeDocument.file_path) ke UploadBlob. Satu baris per pemilik.
+    """
+    __tablename__ = "upload_references"
+    __table_args__ = (
+        db.UniqueConstraint("owner_type", "owner_id", name="uq_upload_references_owner"),
+        db.Index("ix_upload_references_blob", "blob_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    blob_id = db.Column(db.Integer, db.ForeignKey("upload_blobs.id", ondelete="CASCADE"), nullable=False)
+    owner_type = db.Column(db.String(40), nullable=False)  # mis. "employee.photo"
+    owner_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UploadReference {self.owner_type}#{self.owner_id} → {self.blob_id}>"
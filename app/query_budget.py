@@ -0,0 +1,56 @@
+# ==============================================================
+#  app/query_budget.py – Hitung query SQL per request
+# ==============================================================
+#  Setiap statement yang dieksekusi selama request dihitung di
+#  g.query_count (kecuali BEGIN/COMMIT/SAVEPOINT dst.). View bisa
+#  diberi batas dengan @query_budget(n); jika terlampaui, muncul
+#  warning di log (tidak memblokir request).
+#
+#  Jika QUERY_COUNT_HEADER aktif (atau app debug/testing),
+#  respons membawa header X-Query-Count & X-Query-Budget sehingga
+#  jumlah query mudah dicek dari test client / devtools.
+# ==============================================================
+
+import logging
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(limit):
+    """Batas jumlah query untuk satu view (dicek setelah respons dibuat)."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            g.query_budget = limit
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# BEGIN IMMEDIATE dsb. (app/database.py) bukan query data → tidak dihitung
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and not statement.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def init_query_budget(app):
+    @app.after_request
+    def _check_query_budget(response):
+        count = g.get("query_count", 0)
+        budget = g.get("query_budget")
+        if budget is not None and count > budget:
+            logger.warning(f"⚠️ {request.endpoint}: {count} query (batas {budget})")
+        if app.config["QUERY_COUNT_HEADER"] or app.debug or app.testing:
+            response.headers["X-Query-Count"] = str(count)
+            if budget is not None:
+                response.headers["X-Query-Budget"] = str(budget)
+        return response
@@ -0,0 +1,35 @@
+# ==============================================================
+#  app/query_filters.py – Predikat rentang waktu ramah index
+# ==============================================================
+#  func.date(kolom) == hari memaksa SQLite memindai seluruh tabel.
+#  Fungsi di sini menghasilkan rentang setengah terbuka
+#  [awal_hari, awal_hari_berikutnya) pada kolom DateTime mentah,
+#  sehingga index (employee_id, created_at) dapat dipakai.
+# ==============================================================
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_
+
+
+def day_start(day):
+    """datetime pukul 00:00 pada tanggal `day`."""
+    return datetime.combine(day, time.min)
+
+
+def on_day(column, day):
+    """column berada pada tanggal `day` → column >= day AND column < day+1."""
+    return and_(column >= day_start(day), column < day_start(day + timedelta(days=1)))
+
+
+def within_days(column, start=None, end=None):
+    """
+    Daftar predikat untuk tanggal start..end (inklusif, boleh None salah satunya).
+    Pakai dengan query.filter(*within_days(kolom, start, end)).
+    """
+    conditions = []
+    if start:
+        conditions.append(column >= day_start(start))
+    if end:
+        conditions.append(column < day_start(end + timedelta(days=1)))
+    return conditions
@@ -5,8 +5,9 @@
 from flask import Blueprint, render_template
 from flask_login import login_required, current_user
 from datetime import date
-from sqlalchemy import func, literal
-from app.models import Employee, Client, Assignment, Attendance, User
+from app.models import User
+from app.stats import dashboard_stats, DashboardStats
+from app.storage import upload_response
 
 # 🔹 Inisialisasi Blueprint utama
 main_bp = Blueprint('main', __name__)
@@ -18,71 +19,15 @@ main_bp = Blueprint('main', __name__)
 @login_required
 def dashboard():
     """Dashboard utama dengan visualisasi data lintas modul."""
-    from app import db
     today = date.today()
 
-    # ---- Angka ringkasan utama ----
+    # ---- Seluruh angka ringkasan & grafik dalam satu query ----
     try:
-        total_employees = Employee.query.count()
-        active_employees = Employee.query.filter_by(status='aktif').count()
-        total_clients = Client.query.count()
-        total_assignments = Assignment.query.filter_by(status='aktif').count()
-        total_karyawan = User.query.filter_by(role='employee').count()
-
-        # ============================================================
-        # JUMLAH HADIR HARI INI
-        # ============================================================
-        hadir_hari_ini = Attendance.query.filter(
-            Attendance.date == today,
-            func.trim(func.lower(Attendance.status)) == literal('hadir')
-        ).count()
-
-        # ============================================================
-        # GRAFIK 1 — STATUS KARYAWAN (tabel Employee)
-        # ============================================================
-        emp_status = (
-            db.session.query(Employee.status, func.count(Employee.id))
-            .group_by(Employee.status)
-            .all()
-        )
-        status_labels = [s[0].capitalize() for s in emp_status] if emp_status else []
-        status_counts = [s[1] for s in emp_status] if emp_status else []
-
-        # ============================================================
-        # GRAFIK 2 — ABSENSI HARI INI (tabel Attendance)
-        # ============================================================
-        att_labels = ['Hadir', 'Izin', 'Sakit', 'Alpha']
-        att_counts = [
-            Attendance.query.filter(
-                Attendance.date == today,
-                func.trim(func.lower(Attendance.status)) == literal('hadir')
-            ).count(),
-            Attendance.query.filter(
-                Attendance.date == today,
-                func.trim(func.lower(Attendance.status)) == literal('izin')
-            ).count(),
-            Attendance.query.filter(
-                Attendance.date == today,
-                func.trim(func.lower(Attendance.status)) == literal('sakit')
-            ).count(),
-            Attendance.query.filter(
-                Attendance.date == today,
-                func.trim(func.lower(Attendance.status)) == literal('alpha')
-            ).count(),
-        ]
+        stats = dashboard_stats(today)
     except Exception as e:
         print(f"⚠️ Error loading dashboard data: {e}")
         # Nilai default jika tabel belum ada/error
-        total_employees = 0
-        active_employees = 0
-        total_clients = 0
-        total_assignments = 0
-        total_karyawan = 0
-        hadir_hari_ini = 0
-        status_labels = []
-        status_counts = []
-        att_labels = []
-        att_counts = []
+        stats = DashboardStats()
 
     # ------------------------------------------------------------
     # Render template dashboard.html
@@ -92,19 +37,19 @@ def dashboard():
         title='Dashboard - HR Portal',
         user=current_user,
         today=today,
-        total_employees=total_employees,
-        active_employees=active_employees,
-        total_clients=total_clients,
-        total_assignments=total_assignments,
-        total_karyawan=total_karyawan,
-        hadir_hari_ini=hadir_hari_ini,
-        status_labels=status_labels,
-        status_counts=status_counts,
-        att_labels=att_labels,
-        att_counts=att_counts
+        stats=stats
     )
 
 
+# -------------------------------------------------------------
+# 📤  FILE UPLOAD (foto, varian, dokumen) – cache immutable + Range
+# -------------------------------------------------------------
+@main_bp.route('/uploads/<path:name>')
+def upload_file(name):
+    """Sajikan file dari UPLOAD_FOLDER (lihat app/storage.py)."""
+    return upload_response(name)
+
+
 # ==============================================================
 # 🆘 ROUTE DARURAT: FIX DATABASE (WAJIB ADA DI RENDER + SQLITE)
 # ==============================================================
@@ -0,0 +1,159 @@
+# ==============================================================
+#  app/startup.py – Mode startup & pengukuran waktu boot worker
+# ==============================================================
+#  STARTUP_MODE=development (default lokal):
+#    init_schema() + akun default di setiap start: database kosong
+#    dibuat (create_all + stamp), database lama di-upgrade ke head.
+#    Perintah CLI selain `flask run` melewati langkah ini agar
+#    `flask init-db` / `flask db upgrade` yang menyiapkan skema.
+#  STARTUP_MODE=production (default di Render):
+#    tidak membuat tabel & tidak hash password saat worker start;
+#    cukup SATU query ke alembic_version yang dibandingkan dengan
+#    head migrasi. Skema & akun default disiapkan lewat CLI:
+#        flask init-db        → buat / upgrade skema ke head
+#        flask seed-accounts  → akun default (hanya yang belum ada)
+#
+#  Waktu setiap fase create_app dicatat di
+#  app.extensions["startup_timings"] dan dicetak satu baris.
+# ==============================================================
+
+import os
+import re
+import time
+
+import click
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+# Akun bawaan: (username, role, password awal)
+DEFAULT_ACCOUNTS = [
+    ("admin", "admin", "admin123"),
+    ("employee", "employee", "employee123"),
+    ("client", "client", "client123"),
+]
+
+_schema_head = None
+
+_REVISION_LINE = re.compile(r"^(down_revision|revision)\s*=\s*(.+)$", re.MULTILINE)
+
+
+class StartupTimer:
+    """Catat durasi tiap fase startup (detik)."""
+
+    def __init__(self):
+        self.phases = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self._started
+
+    def summary(self):
+        parts = [f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.phases.items()]
+        return f"{', '.join(parts)} (total {self.total * 1000:.0f}ms)"
+
+
+# ------------------------------------------------------------
+# 🗄️ Revisi skema
+# ------------------------------------------------------------
+def schema_head(app):
+    """
+    Revisi head di migrations/versions (dibaca sekali per proses).
+    Cukup membaca baris revision/down_revision, tanpa import alembic.
+    """
+    global _schema_head
+    if _schema_head is None:
+        versions = os.path.join(os.path.dirname(app.root_path), "migrations", "versions")
+        revisions, parents = set(), set()
+        for entry in os.scandir(versions):
+            if not entry.name.endswith(".py"):
+                continue
+            with open(entry.path, encoding="utf-8") as fh:
+                for key, value in _REVISION_LINE.findall(fh.read()):
+                    ids = set(re.findall(r"['\"]([0-9a-f]+)['\"]", value))
+                    (revisions if key == "revision" else parents).update(ids)
+        heads = revisions - parents
+        _schema_head = heads.pop() if len(heads) == 1 else None
+    return _schema_head
+
+
+def current_revision():
+    """Revisi di database (satu query); None jika belum pernah di-migrate."""
+    try:
+        return db.session.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except OperationalError:
+        db.session.rollback()
+        return None
+
+
+def check_schema(app):
+    """Bandingkan revisi database dengan head. True jika sudah terbaru."""
+    revision = current_revision()
+    head = schema_head(app)
+    if revision == head:
+        return True
+    if revision is None:
+        print("⚠️  Database belum diinisialisasi. Jalankan: flask init-db && flask seed-accounts")
+    else:
+        print(f"⚠️  Skema database {revision} ≠ {head}. Jalankan: flask init-db")
+    return False
+
+
+def schema_managed_by_cli():
+    """
+    True jika app dimuat oleh perintah CLI selain `flask run` (flask init-db,
+    flask db upgrade, ...). Perintah itu yang menyiapkan skema, jadi
+    create_app tidak boleh mendahuluinya dengan create_all.
+    """
+    if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+        return False
+    ctx = click.get_current_context(silent=True)
+    return ctx is None or ctx.info_name != "run"
+
+
+def init_schema(app):
+    """
+    Siapkan skema ke head. Database kosong → create_all + stamp head;
+    database lama → alembic upgrade. Mengembalikan revisi akhir.
+    """
+    from flask_migrate import stamp, upgrade
+
+    fresh = current_revision() is None and not db.inspect(db.engine).has_table("users")
+    db.session.remove()  # lepas koneksi sesi sebelum alembic membuka koneksinya sendiri
+    if fresh:
+        db.create_all()
+        stamp(revision="head")
+    else:
+        upgrade()
+    return current_revision()
+
+
+# ------------------------------------------------------------
+# 👤 Akun default
+# ------------------------------------------------------------
+def seed_default_accounts():
+    """Buat akun default yang belum ada (satu query cek). Mengembalikan username baru."""
+    from app.models import User
+
+    usernames = [username for username, _, _ in DEFAULT_ACCOUNTS]
+    existing = {
+        row.username for row in db.session.query(User.username).filter(User.username.in_(usernames))
+    }
+    created = []
+    for username, role, password in DEFAULT_ACCOUNTS:
+        if username in existing:
+            continue
+        user = User(username=username, role=role, active=True)
+        user.set_password(password)
+        db.session.add(user)
+        created.append(username)
+    if created:
+        db.session.commit()
+    return created
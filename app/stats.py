@@ -0,0 +1,335 @@
+# ==============================================================
+#  app/stats.py – Agregasi angka dashboard & ringkasan absensi
+# ==============================================================
+
+from datetime import date, timedelta
+from typing import List, NamedTuple
+
+from sqlalchemy import case, delete, event, func, inspect, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import (
+    Employee, Client, Assignment, Attendance, User, AttendanceDailyStat,
+    ATTENDANCE_STATUSES, normalize_attendance_status,
+)
+
+# Urutan kategori absensi yang ditampilkan di grafik dashboard
+ATTENDANCE_LABELS = ['Hadir', 'Izin', 'Sakit', 'Alpha']
+
+# Kolom hitungan di tabel attendance_daily_stats (= status absensi kanonik)
+STATUS_COLUMNS = ATTENDANCE_STATUSES
+
+
+class DashboardStats(NamedTuple):
+    """Hasil agregasi dashboard utama (siap dikirim ke template)."""
+    total_employees: int = 0
+    active_employees: int = 0
+    total_clients: int = 0
+    total_assignments: int = 0
+    total_karyawan: int = 0
+    hadir_hari_ini: int = 0
+    status_labels: List[str] = []
+    status_counts: List[int] = []
+    att_labels: List[str] = []
+    att_counts: List[int] = []
+
+
+class DailyAttendance(NamedTuple):
+    """Jumlah absensi satu tanggal (hasil baca attendance_daily_stats)."""
+    date: date
+    hadir: int = 0
+    izin: int = 0
+    sakit: int = 0
+    alpha: int = 0
+
+
+def _metric(name, count_expr, key=None):
+    """Satu baris (metric, key, value) untuk UNION ALL."""
+    key_expr = key if key is not None else literal(None, db.String)
+    return select(
+        literal(name).label('metric'),
+        key_expr.label('key'),
+        count_expr.label('value'),
+    )
+
+
+def _daily_sum(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+def dashboard_stats(today=None):
+    """
+    Menghitung seluruh angka dashboard utama dalam SATU round trip.
+    Setiap angka menjadi baris (metric, key, value) dari satu UNION ALL,
+    lalu disusun kembali menjadi DashboardStats di Python.
+    Angka absensi dibaca dari ringkasan attendance_daily_stats.
+    """
+    today = today or date.today()
+
+    stmt = union_all(
+        _metric('total_employees', func.count(Employee.id)),
+        _metric('total_clients', func.count(Client.id)),
+        _metric('total_assignments', func.count(Assignment.id))
+            .where(Assignment.status == 'aktif'),
+        _metric('total_karyawan', func.count(User.id))
+            .where(User.role == 'employee'),
+        _metric('emp_status', func.count(Employee.id), key=Employee.status)
+            .group_by(Employee.status),
+        *[
+            _metric('att_status', _daily_sum(getattr(AttendanceDailyStat, col)),
+                    key=literal(col, db.String))
+                .where(AttendanceDailyStat.date == today)
+            for col in STATUS_COLUMNS
+        ],
+    )
+
+    scalars = {}
+    emp_status = []
+    att_status_counts = {}
+    for metric, key, value in db.session.execute(stmt):
+        if metric == 'emp_status':
+            emp_status.append((key, value))
+        elif metric == 'att_status':
+            att_status_counts[key] = value
+        else:
+            scalars[metric] = value
+
+    return DashboardStats(
+        total_employees=scalars.get('total_employees', 0),
+        active_employees=dict(emp_status).get('aktif', 0),
+        total_clients=scalars.get('total_clients', 0),
+        total_assignments=scalars.get('total_assignments', 0),
+        total_karyawan=scalars.get('total_karyawan', 0),
+        hadir_hari_ini=att_status_counts.get('hadir', 0),
+        status_labels=[(s or 'Lainnya').capitalize() for s, _ in emp_status],
+        status_counts=[c for _, c in emp_status],
+        att_labels=list(ATTENDANCE_LABELS),
+        att_counts=[att_status_counts.get(l.lower(), 0) for l in ATTENDANCE_LABELS],
+    )
+
+
+# ==============================================================
+# 📅 RINGKASAN ABSENSI HARIAN (attendance_daily_stats)
+# ==============================================================
+def _status_key(status):
+    """Petakan status absensi ke nama kolom ringkasan (atau None)."""
+    key = normalize_attendance_status(status)
+    return key if key in STATUS_COLUMNS else None
+
+
+def _client_key(client_id):
+    """client_id dari form bisa berupa string ('3' / '') → int atau None."""
+    return int(client_id) if client_id else None
+
+
+def _before_value(obj, attr):
+    """Nilai atribut sebelum perubahan yang belum di-flush."""
+    state = inspect(obj)
+    history = state.attrs[attr].history
+    if not history.has_changes():
+        return getattr(obj, attr)
+    if history.deleted:
+        return history.deleted[0]
+    if state.persistent:
+        # Atribut di-set saat masih expired → nilai lama dibaca dari database
+        model = type(obj)
+        return state.session.execute(
+            select(getattr(model, attr)).where(model.id == obj.id)
+        ).scalar()
+    return None
+
+
+def _employee_client(session, employee_id):
+    employee = session.get(Employee, employee_id) if employee_id else None
+    return _client_key(employee.client_id) if employee is not None else None
+
+
+def _add_delta(deltas, day, client_id, status, amount):
+    key = _status_key(status)
+    if day is None or key is None or not amount:
+        return
+    bucket = deltas.setdefault((day, client_id), {})
+    bucket[key] = bucket.get(key, 0) + amount
+
+
+def _apply_deltas(session, deltas):
+    """Tambahkan selisih ke ringkasan; baris (tanggal, client) baru di-INSERT."""
+    for (day, client_id), changes in deltas.items():
+        changes = {k: v for k, v in changes.items() if v}
+        if not changes:
+            continue
+        # Increment langsung di SQL agar aman dari lost update antar worker
+        result = session.execute(
+            update(AttendanceDailyStat)
+            .where(AttendanceDailyStat.date == day,
+                   AttendanceDailyStat.client_id == client_id)
+            .values({getattr(AttendanceDailyStat, k): getattr(AttendanceDailyStat, k) + v
+                     for k, v in changes.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            session.execute(insert(AttendanceDailyStat).values(
+                date=day,
+                client_id=client_id,
+                **{col: max(changes.get(col, 0), 0) for col in STATUS_COLUMNS}
+            ))
+
+
+def _attendance_deltas(session, deltas):
+    """Selisih dari Attendance yang ditambah / diubah / dihapus di flush ini."""
+    for obj in session.new:
+        if isinstance(obj, Attendance):
+            # Objek baru: relasi employee hanya terisi jika di-set langsung
+            if obj.employee is not None:
+                client_id = _client_key(obj.employee.client_id)
+            else:
+                client_id = _employee_client(session, obj.employee_id)
+            _add_delta(deltas, obj.date, client_id, obj.status, 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Attendance) or not session.is_modified(obj):
+            continue
+        old_employee = _before_value(obj, 'employee_id')
+        _add_delta(deltas, _before_value(obj, 'date'), _employee_client(session, old_employee),
+                   _before_value(obj, 'status'), -1)
+        _add_delta(deltas, obj.date, _employee_client(session, obj.employee_id), obj.status, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Attendance):
+            # Nilai tersimpan (bukan perubahan yang belum di-flush) yang sedang dihapus
+            _add_delta(deltas, _before_value(obj, 'date'),
+                       _employee_client(session, _before_value(obj, 'employee_id')),
+                       _before_value(obj, 'status'), -1)
+
+
+def _moved_employee_deltas(session, deltas):
+    """
+    Karyawan pindah client → seluruh absensi tersimpannya pindah bucket.
+    Selisih Attendance di atas memakai client BARU untuk nilai lama maupun
+    baru, jadi di sini cukup memindahkan baris yang sudah ada di database.
+    """
+    for obj in session.dirty:
+        if not isinstance(obj, Employee) or obj in session.deleted:
+            continue
+        old_client, new_client = _client_key(_before_value(obj, 'client_id')), _client_key(obj.client_id)
+        if old_client == new_client:
+            continue
+        rows = session.execute(
+            select(Attendance.date, Attendance.status, func.count())
+            .where(Attendance.employee_id == obj.id, Attendance.date.isnot(None))
+            .group_by(Attendance.date, Attendance.status)
+        ).all()
+        for day, status, count in rows:
+            _add_delta(deltas, day, old_client, status, -count)
+            _add_delta(deltas, day, new_client, status, count)
+
+
+def _merge_deleted_clients(session):
+    """
+    Client dihapus → client_id karyawannya menjadi NULL, jadi ringkasannya
+    dipindah ke bucket tanpa client (sebelum FK SET NULL membuat baris ganda).
+    """
+    client_ids = [obj.id for obj in session.deleted if isinstance(obj, Client) and obj.id]
+    if not client_ids:
+        return
+    deltas = {}
+    rows = session.execute(
+        select(AttendanceDailyStat.date, *[getattr(AttendanceDailyStat, col) for col in STATUS_COLUMNS])
+        .where(AttendanceDailyStat.client_id.in_(client_ids))
+    ).all()
+    for day, *counts in rows:
+        for col, count in zip(STATUS_COLUMNS, counts):
+            _add_delta(deltas, day, None, col, count)
+    session.execute(
+        delete(AttendanceDailyStat)
+        .where(AttendanceDailyStat.client_id.in_(client_ids))
+        .execution_options(synchronize_session=False)
+    )
+    _apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "before_flush")
+def _maintain_daily_stats(session, flush_context, instances):
+    """
+    Ringkasan harian mengikuti setiap flush yang menyentuh Attendance,
+    Employee.client_id atau Client: absen masuk, input HR, hapus karyawan
+    (cascade), pindah client, hapus client. Perubahan ikut tersimpan
+    (atau ikut di-rollback) dalam transaksi yang sama.
+    """
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if not any(isinstance(obj, (Attendance, Employee, Client)) for obj in changed):
+        return
+    deltas = {}
+    _moved_employee_deltas(session, deltas)
+    _attendance_deltas(session, deltas)
+    _apply_deltas(session, deltas)
+    _merge_deleted_clients(session)
+
+
+def rebuild_daily_stats(start=None, end=None):
+    """
+    Hitung ulang attendance_daily_stats dari tabel attendance (backfill).
+    Tanpa start/end → seluruh riwayat. Mengembalikan jumlah baris ringkasan.
+    """
+    date_filters = []
+    if start:
+        date_filters.append(Attendance.date >= start)
+    if end:
+        date_filters.append(Attendance.date <= end)
+
+    stale = delete(AttendanceDailyStat)
+    if start:
+        stale = stale.where(AttendanceDailyStat.date >= start)
+    if end:
+        stale = stale.where(AttendanceDailyStat.date <= end)
+    db.session.execute(stale)
+
+    source = (
+        select(
+            Attendance.date,
+            Employee.client_id,
+            *[func.sum(case((Attendance.status == col, 1), else_=0)) for col in STATUS_COLUMNS],
+        )
+        .join(Employee, Employee.id == Attendance.employee_id)
+        .where(Attendance.date.isnot(None), *date_filters)
+        .group_by(Attendance.date, Employee.client_id)
+    )
+    result = db.session.execute(
+        insert(AttendanceDailyStat).from_select(
+            ['date', 'client_id', *STATUS_COLUMNS], source
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def daily_attendance_range(start, end, client_id=None):
+    """
+    Baca jumlah absensi per tanggal untuk rentang [start, end] (inklusif).
+    Tanggal tanpa data tetap dikembalikan dengan nilai 0 agar grafik rapi.
+    """
+    query = (
+        db.session.query(
+            AttendanceDailyStat.date,
+            *[_daily_sum(getattr(AttendanceDailyStat, col)) for col in STATUS_COLUMNS],
+        )
+        .filter(AttendanceDailyStat.date.between(start, end))
+        .group_by(AttendanceDailyStat.date)
+    )
+    if client_id is not None:
+        query = query.filter(AttendanceDailyStat.client_id == client_id)
+
+    rows = {row[0]: DailyAttendance(*row) for row in query.all()}
+
+    days = []
+    current = start
+    while current <= end:
+        days.append(rows.get(current, DailyAttendance(current)))
+        current += timedelta(days=1)
+    return days
+
+
+def attendance_counts(day, client_id=None):
+    """Jumlah hadir/izin/sakit/alpha untuk satu tanggal (dict)."""
+    return daily_attendance_range(day, day, client_id)[0]._asdict()
@@ -0,0 +1,395 @@
+# ==============================================================
+#  app/storage.py – Penyimpanan upload berbasis isi (SHA-256)
+# ==============================================================
+#  Setiap file upload ditulis ke file sementara di UPLOAD_FOLDER
+#  sambil di-hash. Nama akhirnya "<sha256>.<ext>", jadi upload
+#  dengan isi yang sama (foto WhatsApp yang dikirim berulang)
+#  cukup disimpan sekali: jika blob sudah ada, file sementara
+#  dibuang dan nama blob lama yang dipakai.
+#
+#  Gambar lebih dulu melewati ingest_image() (app/images.py):
+#  diperkecil, diputar sesuai EXIF, metadata dibuang, dikompres
+#  ulang. Ukuran asli & tersimpan dicatat di upload_blobs.
+#
+#  Nilai kolom (Employee.photo, ActivityLog.image,
+#  EmployeeDocument.file_path) = nama blob relatif terhadap
+#  UPLOAD_FOLDER; pemakaiannya dicatat di upload_references.
+# ==============================================================
+
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+from typing import NamedTuple
+from urllib.parse import quote
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from app import db
+
+from app.images import DEFAULT_PHOTO, IMAGE_EXTENSIONS, VARIANTS_DIR, ingest_image, is_image, upload_name, upload_path
+from app.models import ActivityLog, Employee, EmployeeDocument, UploadBlob, UploadReference
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Prefix file sementara (diabaikan oleh backfill / GC)
+TMP_PREFIX = ".upload-"
+
+# Jenis pemilik file (owner_type di upload_references)
+OWNER_EMPLOYEE_PHOTO = "employee.photo"
+OWNER_ACTIVITY_IMAGE = "activity_log.image"
+OWNER_EMPLOYEE_DOCUMENT = "employee_document.file_path"
+
+# Seluruh kolom yang menyimpan nama file upload
+UPLOAD_COLUMNS = (
+    (OWNER_EMPLOYEE_PHOTO, Employee, Employee.photo),
+    (OWNER_ACTIVITY_IMAGE, ActivityLog, ActivityLog.image),
+    (OWNER_EMPLOYEE_DOCUMENT, EmployeeDocument, EmployeeDocument.file_path),
+)
+
+
+class StoredFile(NamedTuple):
+    """Hasil simpan: nama untuk kolom database + blob-nya."""
+    name: str
+    blob: UploadBlob
+    created: bool  # False → isi sudah pernah disimpan, tidak ditulis ulang
+
+
+def file_extension(filename):
+    """Ekstensi huruf kecil; 'jpeg' diseragamkan menjadi 'jpg'."""
+    ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+    return "jpg" if ext == "jpeg" else ext
+
+
+def hash_file(path):
+    """(sha256 hex, ukuran byte) sebuah file, dibaca per potongan."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def get_or_create_blob(sha256, name, size, original_size=None):
+    """
+    Buat baris UploadBlob jika belum ada (aman bila dua worker menyimpan
+    isi yang sama bersamaan), lalu kembalikan baris tersebut.
+    """
+    values = dict(sha256=sha256, name=name, size=size, original_size=original_size,
+                  created_at=datetime.utcnow())
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        db.session.execute(
+            insert(UploadBlob).values(**values).on_conflict_do_nothing(index_elements=["sha256"])
+        )
+    else:
+        db.session.add(UploadBlob(**values))
+        db.session.flush()
+    return UploadBlob.query.filter_by(sha256=sha256).one()
+
+
+def _ingest(stream, ext, require_image):
+    """
+    Gambar → (stream hasil ingest, ekstensi, ukuran asli). File lain
+    (PDF) diteruskan apa adanya dengan ukuran asli None (= ukuran tersimpan).
+    """
+    if ext not in IMAGE_EXTENSIONS:
+        return stream, ext, None
+    raw = stream.read()  # dibatasi MAX_CONTENT_LENGTH
+    try:
+        result = ingest_image(raw, ext)
+    except (OSError, ValueError) as e:  # termasuk PIL.UnidentifiedImageError (turunan OSError)
+        if require_image:
+            raise
+        logger.warning(f"⚠️ Gambar upload tidak bisa diproses, disimpan apa adanya: {e}")
+        result = None
+    if result is None:
+        return io.BytesIO(raw), ext, len(raw)
+    return io.BytesIO(result.data), result.ext, len(raw)
+
+
+def store_stream(stream, ext, require_image=False):
+    """
+    Simpan isi `stream` sebagai blob. Gambar di-ingest dulu; hash dihitung
+    sambil menulis, file baru hanya dipindah ke nama akhirnya jika isinya
+    belum ada. require_image=True → gambar rusak menimbulkan error (bukan
+    disimpan mentah). Tidak commit – baris blob ikut transaksi pemanggil.
+    """
+    stream, ext, original_size = _ingest(stream, ext, require_image)
+    folder = current_app.config["UPLOAD_FOLDER"]
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=TMP_PREFIX, suffix=".tmp")
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        blob = UploadBlob.query.filter_by(sha256=sha256).first()
+        name = blob.name if blob else f"{sha256}.{ext}"
+        path = upload_path(name)
+
+        created = True
+        if os.path.exists(path):
+            try:
+                # Blob lama dipakai ulang: perbarui mtime agar `flask uploads gc`
+                # tidak menganggapnya yatim sebelum referensi baru di-commit
+                os.utime(path)
+                created = False
+            except FileNotFoundError:
+                pass  # baru saja dibersihkan GC → tulis ulang dari file sementara
+        if created:
+            os.chmod(tmp_path, 0o644)  # mkstemp membuat file 0600
+            os.replace(tmp_path, path)
+            tmp_path = None
+
+        if blob is None:
+            blob = get_or_create_blob(sha256, name, size, original_size or size)
+        return StoredFile(blob.name, blob, created)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_upload(file, allowed_extensions):
+    """
+    Simpan FileStorage dari form. None jika tidak ada file atau
+    ekstensinya tidak diizinkan.
+    """
+    if not file or not file.filename or "." not in file.filename:
+        return None
+    if file.filename.rsplit(".", 1)[1].lower() not in allowed_extensions:
+        return None
+    return store_stream(file.stream, file_extension(file.filename))
+
+
+def link_upload(stored, owner_type, owner_id):
+    """Catat bahwa kolom milik (owner_type, owner_id) kini memakai blob ini."""
+    ref = UploadReference.query.filter_by(owner_type=owner_type, owner_id=owner_id).first()
+    if ref is None:
+        db.session.add(UploadReference(blob_id=stored.blob.id, owner_type=owner_type, owner_id=owner_id))
+    else:
+        ref.blob_id = stored.blob.id
+
+
+# ==============================================================
+# 📤 PENYAJIAN FILE UPLOAD (/uploads/<nama>)
+# ==============================================================
+#  Nama file upload unik (sha256 / uuid) dan isinya tidak pernah
+#  berubah, jadi browser boleh menyimpan selamanya (immutable).
+#  Range didukung (PDF dokumen), dan pengiriman file bisa
+#  diserahkan ke proxy depan lewat X-Accel-Redirect / X-Sendfile
+#  agar worker gunicorn tidak tertahan mengirim file besar.
+# ==============================================================
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.[0-9a-z]+$")
+
+
+def upload_etag(name, stat):
+    """ETag kuat: blob asli → sha256 isinya; file lain → mtime + ukuran."""
+    match = _BLOB_NAME.match(name)
+    if match:
+        return match.group(1)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _is_mutable(name):
+    """File yang boleh diganti di tempat (foto default & variannya)."""
+    stem = DEFAULT_PHOTO.rsplit(".", 1)[0]
+    base = name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return name == DEFAULT_PHOTO or (name.startswith(f"{VARIANTS_DIR}/") and base == stem)
+
+
+def upload_response(name):
+    """Response untuk satu file upload (404 jika tidak ada / di luar UPLOAD_FOLDER)."""
+    folder = current_app.config["UPLOAD_FOLDER"]
+    path = safe_join(folder, name)
+    if path is None or name.rsplit("/", 1)[-1].startswith(".") or not os.path.isfile(path):
+        abort(404)
+
+    stat = os.stat(path)
+    etag = upload_etag(name, stat)
+    mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    accel = current_app.config["UPLOAD_ACCEL"]
+
+    if accel == "x-accel-redirect":
+        # Nginx mengirim isi file (termasuk Range) dari location internal
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = current_app.config["UPLOAD_ACCEL_PREFIX"] + quote(name)
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        response.make_conditional(request)
+    else:
+        response = send_file(
+            path,
+            request.environ,
+            mimetype=mimetype,
+            use_x_sendfile=accel == "x-sendfile",
+            response_class=current_app.response_class,
+            conditional=True,
+            etag=etag,
+            last_modified=stat.st_mtime,
+        )
+
+    if response.status_code in (200, 206, 304):
+        response.cache_control.no_cache = None  # default send_file
+        # Dokumen (KTP, ijazah) tidak boleh disimpan cache bersama/proxy
+        if is_image(name):
+            response.cache_control.public = True
+        else:
+            response.cache_control.private = True
+        if _is_mutable(name):
+            response.cache_control.max_age = 86400
+        else:
+            response.cache_control.max_age = current_app.config["UPLOAD_CACHE_MAX_AGE"]
+            response.cache_control.immutable = True
+    return response
+
+
+# ==============================================================
+# 🧹 GARBAGE COLLECTOR FILE UPLOAD (flask uploads gc)
+# ==============================================================
+#  Hapus karyawan/client atau ganti foto hanya menghapus baris
+#  database; file lamanya tertinggal. GC membuat set nama file yang
+#  masih dirujuk kolom UPLOAD_COLUMNS, lalu menelusuri UPLOAD_FOLDER
+#  (os.scandir). File yang tidak dirujuk & lebih tua dari masa
+#  tenggang dipindah ke karantina (atau dihapus).
+# ==============================================================
+
+# File di UPLOAD_FOLDER yang dipakai langsung oleh template (bukan upload)
+PROTECTED_UPLOADS = {DEFAULT_PHOTO, "logo login.png", "logo login.svg"}
+
+
+class OrphanFile(NamedTuple):
+    root: str   # folder asal (UPLOAD_FOLDER / inbox foto aktivitas)
+    name: str   # path relatif terhadap root
+    size: int
+
+
+def referenced_uploads():
+    """Set nama file (relatif UPLOAD_FOLDER) yang masih dirujuk database."""
+    names = set(PROTECTED_UPLOADS)
+    for _owner_type, _model, column in UPLOAD_COLUMNS:
+        query = db.session.query(column).filter(column.isnot(None), column != "").distinct()
+        for (value,) in query.execution_options(yield_per=1000):
+            names.add(upload_name(value))
+    return names
+
+
+def _scan_files(root):
+    """(path relatif, DirEntry) seluruh file di bawah root."""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, rel_dir)))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(rel)
+            elif entry.is_file(follow_symlinks=False):
+                yield rel, entry
+
+
+def _variant_source_stem(rel):
+    """'variants/avatar/foto/x.webp' → 'foto/x' (None jika bukan path varian)."""
+    parts = rel.split("/", 2)
+    if len(parts) < 3:
+        return None
+    return parts[2].rsplit(".", 1)[0]
+
+
+def find_orphan_uploads(grace_seconds):
+    """Generator OrphanFile: file upload / varian / file sementara yang tidak dirujuk."""
+    cutoff = datetime.now().timestamp() - grace_seconds
+    referenced = referenced_uploads()
+    referenced_stems = {name.rsplit(".", 1)[0] for name in referenced}
+
+    folder = current_app.config["UPLOAD_FOLDER"]
+    for rel, entry in _scan_files(folder):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            continue  # masih dalam masa tenggang (upload yang belum commit)
+        if rel.startswith(f"{VARIANTS_DIR}/"):
+            if _variant_source_stem(rel) in referenced_stems:
+                continue
+        elif rel in referenced:
+            continue
+        yield OrphanFile(folder, rel, stat.st_size)
+
+    # Inbox foto aktivitas: file mentah yang log-nya sudah hilang / selesai
+    inbox = current_app.config["ACTIVITY_PHOTO_INBOX"]
+    raw_names = {
+        value for (value,) in
+        db.session.query(ActivityLog.image_raw).filter(ActivityLog.image_raw.isnot(None))
+    }
+    for rel, entry in _scan_files(inbox):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime <= cutoff and rel not in raw_names:
+            yield OrphanFile(inbox, rel, stat.st_size)
+
+
+def remove_orphan(orphan, quarantine_dir=None):
+    """Pindahkan file ke quarantine_dir (struktur folder dipertahankan) atau hapus."""
+    src = os.path.join(orphan.root, *orphan.name.split("/"))
+    if quarantine_dir is None:
+        os.remove(src)
+        return
+    area = "uploads" if orphan.root == current_app.config["UPLOAD_FOLDER"] else "activity_inbox"
+    dst = os.path.join(quarantine_dir, area, *orphan.name.split("/"))
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.move(src, dst)
+
+
+def prune_upload_index(removed_names=()):
+    """
+    Bersihkan upload_references yang pemiliknya sudah terhapus, dan
+    upload_blobs yang file-nya sudah dibuang GC. Mengembalikan
+    (jumlah referensi, jumlah blob) yang dihapus. Tidak commit.
+    """
+    refs = 0
+    for owner_type, model, _column in UPLOAD_COLUMNS:
+        refs += (
+            UploadReference.query
+            .filter(
+                UploadReference.owner_type == owner_type,
+                ~UploadReference.owner_id.in_(db.session.query(model.id)),
+            )
+            .delete(synchronize_session=False)
+        )
+
+    blobs = 0
+    removed_names = list(removed_names)
+    for i in range(0, len(removed_names), 500):
+        batch = removed_names[i:i + 500]
+        blob_ids = db.session.query(UploadBlob.id).filter(UploadBlob.name.in_(batch))
+        refs += (
+            UploadReference.query
+            .filter(UploadReference.blob_id.in_(blob_ids))
+            .delete(synchronize_session=False)
+        )
+        blobs += UploadBlob.query.filter(UploadBlob.name.in_(batch)).delete(synchronize_session=False)
+    return refs, blobs
@@ -1,8 +1,7 @@
-from app import create_app, db
+from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
+    # Skema & akun default sudah disiapkan di create_app (STARTUP_MODE=development)
     app.run(host='0.0.0.0', debug=True)
@@ -97,14 +97,25 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=get_metadata(),
-            **conf_args
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            # Batch migration SQLite menyalin ulang tabel; FK harus nonaktif
+            # (PRAGMA ini diabaikan di dalam transaksi, jadi lewat DBAPI langsung)
+            connection.connection.driver_connection.execute("PRAGMA foreign_keys=OFF")
+
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=get_metadata(),
+                **conf_args
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if sqlite:
+                # Koneksi kembali ke pool aplikasi → FK aktif lagi (lihat app/database.py)
+                connection.connection.driver_connection.execute("PRAGMA foreign_keys=ON")
 
 
 if context.is_offline_mode():
@@ -0,0 +1,55 @@
+"""add attendance_daily_stats
+
+Revision ID: 8c41d2a7e903
+Revises: 26f00b9dc19e
+Create Date: 2026-10-17 08:12:40.114205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d2a7e903'
+down_revision = '26f00b9dc19e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=True),
+        sa.Column('hadir', sa.Integer(), nullable=False),
+        sa.Column('izin', sa.Integer(), nullable=False),
+        sa.Column('sakit', sa.Integer(), nullable=False),
+        sa.Column('alpha', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attendance_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_daily_stats_date_client', ['date', 'client_id'], unique=False)
+
+    # Backfill dari riwayat absensi yang sudah ada
+    op.execute("""
+        INSERT INTO attendance_daily_stats (date, client_id, hadir, izin, sakit, alpha, updated_at)
+        SELECT a.date, e.client_id,
+               SUM(CASE WHEN trim(lower(a.status)) = 'hadir' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN trim(lower(a.status)) = 'izin' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN trim(lower(a.status)) = 'sakit' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN trim(lower(a.status)) = 'alpha' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM attendance a
+        JOIN employees e ON e.id = a.employee_id
+        WHERE a.date IS NOT NULL
+        GROUP BY a.date, e.client_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_daily_stats_date_client')
+
+    op.drop_table('attendance_daily_stats')
@@ -0,0 +1,26 @@
+"""add upload_blobs.original_size
+
+Revision ID: a9d3e6b05c72
+Revises: f2b7c4d91e63
+Create Date: 2026-10-17 15:02:41.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e6b05c72'
+down_revision = 'f2b7c4d91e63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('upload_blobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('upload_blobs', schema=None) as batch_op:
+        batch_op.drop_column('original_size')
@@ -0,0 +1,33 @@
+"""add employees.job_type_key + index
+
+Revision ID: b4c8e2f17a90
+Revises: a9d3e6b05c72
+Create Date: 2026-10-17 15:48:19.664021
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c8e2f17a90'
+down_revision = 'a9d3e6b05c72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('job_type_key', sa.String(length=50), nullable=True))
+
+    # Sama dengan normalize_job_type(): trim + huruf kecil, string kosong → NULL
+    op.execute("UPDATE employees SET job_type_key = NULLIF(LOWER(TRIM(job_type)), '')")
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index('ix_employees_job_type_key_status', ['job_type_key', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_job_type_key_status')
+        batch_op.drop_column('job_type_key')
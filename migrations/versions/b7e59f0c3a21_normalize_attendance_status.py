@@ -0,0 +1,31 @@
+"""normalize attendance status + (date, status) index
+
+Revision ID: b7e59f0c3a21
+Revises: 8c41d2a7e903
+Create Date: 2026-10-17 09:03:18.520947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e59f0c3a21'
+down_revision = '8c41d2a7e903'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backfill: simpan status dalam bentuk kanonik (huruf kecil, tanpa spasi)
+    op.execute("UPDATE attendance SET status = lower(trim(status)) WHERE status IS NOT NULL")
+    op.execute("UPDATE attendance SET status = 'alpha' WHERE status = 'alfa'")
+    op.execute("UPDATE attendance SET status = NULL WHERE status = ''")
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_date_status', ['date', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_date_status')
@@ -0,0 +1,26 @@
+"""add assignments (client_id, status) index
+
+Revision ID: c6e1f8a23d47
+Revises: b4c8e2f17a90
+Create Date: 2026-10-17 16:21:37.902518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e1f8a23d47'
+down_revision = 'b4c8e2f17a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.create_index('ix_assignments_client_status', ['client_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignments_client_status')
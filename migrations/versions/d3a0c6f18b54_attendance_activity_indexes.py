@@ -0,0 +1,91 @@
+"""attendance & activity_log indexes, unique (employee_id, date)
+
+Revision ID: d3a0c6f18b54
+Revises: b7e59f0c3a21
+Create Date: 2026-10-17 09:47:02.336810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a0c6f18b54'
+down_revision = 'b7e59f0c3a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Absensi ganda (employee_id, date) digabung sebelum membuat unique index.
+    # Biasanya pasangan double tap: satu baris berisi absen masuk, satu lagi
+    # absen pulang. Baris id terkecil menampung gabungannya: check_in paling
+    # awal, check_out paling akhir, status terakhir yang terisi, lembur terbesar.
+    op.execute("""
+        UPDATE attendance
+        SET check_in = (
+                SELECT MIN(d.check_in) FROM attendance d
+                WHERE d.employee_id = attendance.employee_id AND d.date = attendance.date
+            ),
+            check_out = (
+                SELECT MAX(d.check_out) FROM attendance d
+                WHERE d.employee_id = attendance.employee_id AND d.date = attendance.date
+            ),
+            status = COALESCE((
+                SELECT d.status FROM attendance d
+                WHERE d.employee_id = attendance.employee_id AND d.date = attendance.date
+                  AND d.status IS NOT NULL
+                ORDER BY d.id DESC LIMIT 1
+            ), status),
+            overtime_hours = (
+                SELECT MAX(d.overtime_hours) FROM attendance d
+                WHERE d.employee_id = attendance.employee_id AND d.date = attendance.date
+            )
+        WHERE id IN (
+            SELECT MIN(id) FROM attendance
+            WHERE date IS NOT NULL
+            GROUP BY employee_id, date
+            HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM attendance
+        WHERE date IS NOT NULL
+          AND id NOT IN (
+              SELECT MIN(id) FROM attendance
+              WHERE date IS NOT NULL
+              GROUP BY employee_id, date
+          )
+    """)
+
+    # Ringkasan harian dihitung ulang karena baris ganda sudah digabung
+    op.execute("DELETE FROM attendance_daily_stats")
+    op.execute("""
+        INSERT INTO attendance_daily_stats (date, client_id, hadir, izin, sakit, alpha, updated_at)
+        SELECT a.date, e.client_id,
+               SUM(CASE WHEN a.status = 'hadir' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'izin' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'sakit' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'alpha' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM attendance a
+        JOIN employees e ON e.id = a.employee_id
+        WHERE a.date IS NOT NULL
+        GROUP BY a.date, e.client_id
+    """)
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('uq_attendance_employee_date', ['employee_id', 'date'], unique=True)
+
+    with op.batch_alter_table('activity_log', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_log_employee_created', ['employee_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_activity_log_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('activity_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_log_created_at')
+        batch_op.drop_index('ix_activity_log_employee_created')
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('uq_attendance_employee_date')
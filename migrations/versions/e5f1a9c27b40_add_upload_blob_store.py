@@ -0,0 +1,51 @@
+"""add upload_blobs & upload_references
+
+Revision ID: e5f1a9c27b40
+Revises: d3a0c6f18b54
+Create Date: 2026-10-17 13:05:22.481930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f1a9c27b40'
+down_revision = 'd3a0c6f18b54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        sa.UniqueConstraint('sha256')
+    )
+    op.create_table('upload_references',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('blob_id', sa.Integer(), nullable=False),
+        sa.Column('owner_type', sa.String(length=40), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['blob_id'], ['upload_blobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('owner_type', 'owner_id', name='uq_upload_references_owner')
+    )
+    with op.batch_alter_table('upload_references', schema=None) as batch_op:
+        batch_op.create_index('ix_upload_references_blob', ['blob_id'], unique=False)
+
+    # File yang sudah ada diindeks lewat: flask uploads index [--dedupe]
+
+
+def downgrade():
+    with op.batch_alter_table('upload_references', schema=None) as batch_op:
+        batch_op.drop_index('ix_upload_references_blob')
+
+    op.drop_table('upload_references')
+    op.drop_table('upload_blobs')
@@ -0,0 +1,50 @@
+"""unique attendance_daily_stats (date, client_id)
+
+Revision ID: e8b3d5a1f064
+Revises: c6e1f8a23d47
+Create Date: 2026-10-18 09:05:12.417630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3d5a1f064'
+down_revision = 'c6e1f8a23d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ringkasan lama bisa berisi baris ganda (dua worker insert bersamaan)
+    # atau hitungan basi (karyawan dihapus / pindah client) → hitung ulang
+    op.execute("DELETE FROM attendance_daily_stats")
+    op.execute("""
+        INSERT INTO attendance_daily_stats (date, client_id, hadir, izin, sakit, alpha, updated_at)
+        SELECT a.date, e.client_id,
+               SUM(CASE WHEN a.status = 'hadir' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'izin' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'sakit' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'alpha' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM attendance a
+        JOIN employees e ON e.id = a.employee_id
+        WHERE a.date IS NOT NULL
+        GROUP BY a.date, e.client_id
+    """)
+
+    with op.batch_alter_table('attendance_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_daily_stats_date_client')
+
+    op.create_index(
+        'uq_attendance_daily_stats_date_client', 'attendance_daily_stats',
+        ['date', sa.text('coalesce(client_id, 0)')], unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_attendance_daily_stats_date_client', table_name='attendance_daily_stats')
+
+    with op.batch_alter_table('attendance_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_daily_stats_date_client', ['date', 'client_id'], unique=False)
@@ -0,0 +1,31 @@
+"""add activity_log.image_status & image_raw
+
+Revision ID: f2b7c4d91e63
+Revises: e5f1a9c27b40
+Create Date: 2026-10-17 14:12:08.553104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c4d91e63'
+down_revision = 'e5f1a9c27b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('activity_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('image_raw', sa.String(length=255), nullable=True))
+
+    # Log lama yang sudah punya foto dianggap selesai diproses
+    op.execute("UPDATE activity_log SET image_status = 'ready' WHERE image IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('activity_log', schema=None) as batch_op:
+        batch_op.drop_column('image_raw')
+        batch_op.drop_column('image_status')
@@ -0,0 +1,39 @@
+# ==============================================================
+#  tests/conftest.py – App di database SQLite sementara
+# ==============================================================
+#  Setiap test mendapat app sendiri (STARTUP_MODE=development →
+#  skema dibuat lewat init_schema + akun default admin/employee/client)
+#  dengan database & folder instance di tmp_path.
+# ==============================================================
+
+import pytest
+
+from app import create_app, db
+from app.identity import _identity_cache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("STARTUP_MODE", "development")
+    monkeypatch.setenv("CACHE_VERSION_DIR", str(tmp_path / "cache_versions"))
+    monkeypatch.delenv("FLASK_RUN_FROM_CLI", raising=False)
+    # Cache identitas per proses; id user sama di setiap database test
+    _identity_cache.clear()
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password):
+    response = client.post("/auth/login", data={"username": username, "password": password})
+    assert response.status_code == 302, "login gagal"
+    return response
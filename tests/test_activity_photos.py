@@ -0,0 +1,61 @@
+# Foto aktivitas: fallback di request tidak boleh tidur di antara retry
+
+import time
+
+import pytest
+
+import app.activity_photos as activity_photos
+from app import db
+from app.activity_photos import STATUS_FAILED, STATUS_PENDING, photo_queue
+from app.models import ActivityLog, Employee
+
+
+@pytest.fixture
+def pending_log(app):
+    with app.app_context():
+        employee = Employee(name="Karyawan Foto")
+        db.session.add(employee)
+        db.session.flush()
+        log = ActivityLog(employee_id=employee.id, description="patroli",
+                          image_status=STATUS_PENDING, image_raw="hilang.jpg")
+        db.session.add(log)
+        db.session.commit()
+        return log.id
+
+
+def _status(app, log_id):
+    with app.app_context():
+        return db.session.get(ActivityLog, log_id).image_status
+
+
+def test_inline_fallback_tries_once_and_stays_pending(app, pending_log, monkeypatch):
+    calls = []
+
+    def flaky(log_id):
+        calls.append(log_id)
+        raise OSError("disk penuh")
+
+    monkeypatch.setattr(activity_photos, "process_activity_photo", flaky)
+    app.config.update(ACTIVITY_PHOTO_QUEUE_SIZE=0, ACTIVITY_PHOTO_RETRIES=3)
+
+    started = time.perf_counter()
+    assert photo_queue.submit(pending_log) is False
+    assert time.perf_counter() - started < 0.5
+    assert calls == [pending_log]
+    assert _status(app, pending_log) == STATUS_PENDING
+
+
+def test_background_retries_then_fails(app, pending_log, monkeypatch):
+    calls = []
+
+    def flaky(log_id):
+        calls.append(log_id)
+        raise OSError("disk penuh")
+
+    monkeypatch.setattr(activity_photos, "process_activity_photo", flaky)
+    monkeypatch.setattr(activity_photos.time, "sleep", lambda seconds: None)
+    app.config.update(ACTIVITY_PHOTO_RETRIES=2)
+
+    assert photo_queue.process(pending_log) is False
+    assert len(calls) == 3
+    assert _status(app, pending_log) == STATUS_FAILED
@@ -0,0 +1,77 @@
+# Engine database: PRAGMA SQLite & absen masuk paralel dari banyak proses
+
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Employee, User
+
+from conftest import login
+
+
+@contextmanager
+def begin_statements(app):
+    """Kumpulkan BEGIN ... yang dikirim ke SQLite selama blok berjalan."""
+    seen = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("BEGIN"):
+            seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_sqlite_pragmas(app):
+    with app.app_context():
+        pragma = lambda name: db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("foreign_keys") == 1
+        assert pragma("busy_timeout") == app.config["SQLITE_BUSY_TIMEOUT_MS"]
+
+
+def _tree_state(path):
+    """{path relatif: mtime_ns} seluruh file di bawah path."""
+    return {p.relative_to(path): p.stat().st_mtime_ns for p in path.rglob("*") if p.is_file()}
+
+
+def test_parallel_clock_in(app, tmp_path):
+    # Double tap dari worker berbeda: tanpa 500 / "database is locked",
+    # satu absensi per karyawan & ringkasan harian cocok
+    workdir = tmp_path / "stress"
+    instance = Path(app.instance_path)
+    before = _tree_state(instance)
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=[
+            "database", "stress", "--workers", "4", "--employees", "20", "--taps", "2",
+            "--workdir", str(workdir),
+        ])
+    assert result.exit_code == 0, result.output
+    assert "Status: {302: 40}" in result.output
+    # Database & versi cache worker ada di folder uji, instance/ repo tidak disentuh
+    assert (workdir / "stress.db").exists()
+    assert _tree_state(instance) == before
+
+
+def test_immediate_only_for_read_then_write_views(app, client):
+    with app.app_context():
+        user = User.query.filter_by(username="employee").first()
+        db.session.add(Employee(name="Karyawan Uji", job_type="security", user_id=user.id))
+        db.session.commit()
+
+    # Login (hash password) tidak boleh memegang lock tulis
+    with begin_statements(app) as seen:
+        login(client, "employee", "employee123")
+    assert seen and "BEGIN IMMEDIATE" not in seen
+
+    with begin_statements(app) as seen:
+        response = client.post("/employee/do_attendance", data={"action": "clock_in"})
+    assert response.status_code == 302
+    assert seen[0] == "BEGIN IMMEDIATE"
@@ -0,0 +1,24 @@
+# Cache identitas login harus ikut basi saat User diubah lewat UPDATE massal
+
+from app import db
+from app.identity import load_identity
+from app.models import User
+
+from conftest import login
+
+
+def test_bulk_update_invalidates_identity(app, client):
+    login(client, "employee", "employee123")
+    with client.session_transaction() as session:
+        session_id = session["_user_id"]
+
+    with app.app_context():
+        assert load_identity(session_id) is not None  # sekarang ada di cache
+
+        # Nonaktifkan akun tanpa melewati flush ORM
+        db.session.query(User).filter(User.username == "employee").update(
+            {User.active: False}, synchronize_session=False
+        )
+        db.session.commit()
+
+        assert load_identity(session_id) is None
@@ -0,0 +1,41 @@
+# Jumlah query per request (X-Query-Count) tidak melebihi @query_budget view
+
+import pytest
+
+from app import db
+from app.identity import _identity_cache
+from app.models import Employee, User
+
+from conftest import login
+
+
+@pytest.fixture
+def employee_client(app, client):
+    with app.app_context():
+        user = User.query.filter_by(username="employee").first()
+        db.session.add(Employee(name="Karyawan Uji", job_type="security", user_id=user.id))
+        db.session.commit()
+    login(client, "employee", "employee123")
+    return client
+
+
+@pytest.mark.parametrize("cold_identity", [True, False])
+def test_employee_dashboard_within_budget(employee_client, cold_identity):
+    if cold_identity:
+        _identity_cache.clear()  # user_loader harus SELECT users lagi
+    else:
+        employee_client.get("/employee/dashboard_employee")
+
+    response = employee_client.get("/employee/dashboard_employee")
+    assert response.status_code == 200
+    count = int(response.headers["X-Query-Count"])
+    budget = int(response.headers["X-Query-Budget"])
+    assert count <= budget, f"{count} query, batas {budget}"
+
+
+def test_transaction_statements_not_counted(employee_client):
+    # BEGIN / BEGIN IMMEDIATE dari app/database.py bukan query data
+    _identity_cache.clear()
+    response = employee_client.get("/employee/dashboard_employee")
+    # users (identitas) + employee & absensi hari ini + log aktivitas hari ini
+    assert response.headers["X-Query-Count"] == "3"
@@ -0,0 +1,27 @@
+# Startup worker production: tanpa modul berat & tanpa create_all
+
+from app.startup import schema_head
+
+
+def test_production_startup_skips_heavy_imports(app, monkeypatch):
+    # Database sementara sudah di head, jadi subprocess create_app hanya cek revisi
+    monkeypatch.setenv("STARTUP_MODE", "production")
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=["import-report", "--forbid", "--top", "5"])
+    assert result.exit_code == 0, result.output
+    assert "Modul berat" not in result.output
+
+
+def test_development_startup_migrates_to_head(app):
+    from app.startup import current_revision
+
+    with app.app_context():
+        assert current_revision() == schema_head(app)
+
+
+def test_startup_report_lists_phases(app):
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=["startup-report"])
+    assert result.exit_code == 0, result.output
+    for phase in ("config", "extensions", "blueprints", "schema", "total"):
+        assert phase in result.output
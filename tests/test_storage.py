@@ -0,0 +1,48 @@
+# Upload berbasis isi: blob yang dipakai ulang tidak boleh dibersihkan GC
+
+import io
+import os
+import time
+
+import pytest
+
+from app import db
+from app.storage import OWNER_EMPLOYEE_DOCUMENT, find_orphan_uploads, link_upload, store_stream, upload_path
+
+PDF_BYTES = b"%PDF-1.4\n% dokumen uji\n%%EOF\n"
+
+
+@pytest.fixture
+def upload_app(app, tmp_path):
+    app.config.update(
+        UPLOAD_FOLDER=str(tmp_path / "uploads"),
+        ACTIVITY_PHOTO_INBOX=str(tmp_path / "activity_inbox"),
+        UPLOAD_QUARANTINE_DIR=str(tmp_path / "quarantine"),
+    )
+    return app
+
+
+def test_dedup_hit_survives_gc(upload_app):
+    with upload_app.app_context():
+        # Blob lama tanpa rujukan, sudah melewati masa tenggang GC
+        old = store_stream(io.BytesIO(PDF_BYTES), "pdf")
+        db.session.commit()
+        path = upload_path(old.name)
+        stale = time.time() - 48 * 3600
+        os.utime(path, (stale, stale))
+        assert old.name in {orphan.name for orphan in find_orphan_uploads(24 * 3600)}
+
+        # Upload baru dengan isi sama → blob lama dipakai ulang (belum commit)
+        stored = store_stream(io.BytesIO(PDF_BYTES), "pdf")
+        assert not stored.created and stored.name == old.name
+
+        # GC berjalan di antara simpan file & commit rujukan
+        result = upload_app.test_cli_runner().invoke(
+            args=["uploads", "gc", "--delete", "--grace-hours", "24"]
+        )
+        assert result.exit_code == 0, result.output
+        assert os.path.exists(path)
+
+        link_upload(stored, OWNER_EMPLOYEE_DOCUMENT, 1)
+        db.session.commit()
+        assert os.path.exists(path)